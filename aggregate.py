@@ -0,0 +1,201 @@
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from journal import JOURNAL_EXT, load_readonly
+import storage
+
+CACHE_NAME = ".aggregate-cache.json"
+CACHE_VERSION = 1
+
+# Grade bands on a 7-point scale: (minimum average, grade, grade points)
+GRADE_SCALE = [(85.0, "HD", 7.0), (75.0, "D", 6.0), (65.0, "C", 5.0), (50.0, "P", 4.0), (0.0, "F", 0.0)]
+
+FIELDS = ["semester", "subjects", "graded_subjects", "completed_weight", "contributed",
+          "weighted_average", "subject_average", "gpa", "error"]
+
+
+# Maps an average mark to its (grade, grade points)
+def grade_for(average: float) -> Tuple[str, float]:
+    for minimum, grade, points in GRADE_SCALE:
+        if average >= minimum - 1e-9:
+            return grade, points
+    return GRADE_SCALE[-1][1], GRADE_SCALE[-1][2]
+
+
+# Hashes a save file and its journal (if any) together
+def content_digest(path: str) -> str:
+    h = hashlib.sha1()
+    for p in (path, path + JOURNAL_EXT):
+        try:
+            with open(p, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    h.update(chunk)
+        except FileNotFoundError:
+            pass
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+# Worker: the partial aggregate of one semester file (sums only, so partials combine exactly).
+# Subjects without any marked work count towards "subjects" but not the averages or GPA.
+def file_partial(path: str) -> Dict[str, Any]:
+    try:
+        gb = load_readonly(path)
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+    partial = {"subjects": len(gb.subjects), "graded_subjects": 0, "completed_weight": 0.0, "contributed": 0.0,
+               "average_sum": 0.0, "points_sum": 0.0, "error": None}
+    for subj in gb.subjects.values():
+        partial["completed_weight"] += subj.completed_weight
+        partial["contributed"] += subj.contributed
+        if subj.completed_weight > 1e-9:
+            average = subj.contributed / subj.completed_weight * 100.0
+            partial["graded_subjects"] += 1
+            partial["average_sum"] += average
+            partial["points_sum"] += grade_for(average)[1]
+    return partial
+
+
+# Turns a partial (or a sum of partials) into the reported summary
+def summarize(name: str, partial: Dict[str, Any]) -> Dict[str, Any]:
+    if partial.get("error"):
+        return {**dict.fromkeys(FIELDS), "semester": name, "error": partial["error"]}
+    graded = partial["graded_subjects"]
+    return {
+        "semester": name,
+        "subjects": partial["subjects"],
+        "graded_subjects": graded,
+        "completed_weight": partial["completed_weight"],
+        "contributed": partial["contributed"],
+        "weighted_average": (partial["contributed"] / partial["completed_weight"] * 100.0
+                             if partial["completed_weight"] > 1e-9 else None),
+        "subject_average": partial["average_sum"] / graded if graded else None,
+        "gpa": partial["points_sum"] / graded if graded else None,
+        "error": None,
+    }
+
+
+# Overall weighted average and GPA across every semester file in a saves directory.
+# Per-file partial aggregates are cached in CACHE_NAME: a file whose mtime and size (and
+# its journal's) are unchanged is reused without being read, one whose stats changed but
+# whose content hash matches is reused after hashing, and only the rest are reloaded.
+class Aggregator:
+    # Loads the stored cache for saves_path, if there is one
+    def __init__(self, saves_path: str, workers: int = 0):
+        self.saves_path = saves_path
+        self.path = os.path.join(saves_path, CACHE_NAME)
+        self.workers = workers
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.recomputed: List[str] = []
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == CACHE_VERSION:
+                self.entries = data.get("files", {})
+        except (OSError, ValueError, AttributeError):
+            self.entries = {}
+
+    # One scandir pass: {save file name: (mtime, size, journal mtime or None, journal size)}
+    def scan(self) -> Dict[str, Tuple[float, int, Optional[float], int]]:
+        saves, journals = {}, {}
+        try:
+            with os.scandir(self.saves_path) as it:
+                for de in it:
+                    if de.name.startswith("."):
+                        continue
+                    lower = de.name.lower()
+                    try:
+                        if lower.endswith(storage.SAVE_EXTENSIONS):
+                            st = de.stat()
+                            saves[de.name] = (st.st_mtime, st.st_size)
+                        elif lower.endswith(JOURNAL_EXT):
+                            st = de.stat()
+                            journals[de.name[:-len(JOURNAL_EXT)]] = (st.st_mtime, st.st_size)
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        return {name: stat + journals.get(name, (None, 0)) for name, stat in saves.items()}
+
+    # Brings the cache up to date and returns (per-semester summaries, overall summary)
+    def refresh(self) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        stats = self.scan()
+        dirty = False
+        for name in [n for n in self.entries if n not in stats]:
+            del self.entries[name]
+            dirty = True
+
+        stale = []
+        for name, stat in stats.items():
+            entry = self.entries.get(name)
+            if entry is not None and tuple(entry["stat"]) == stat:
+                continue
+            digest = content_digest(os.path.join(self.saves_path, name))
+            if entry is not None and entry["sha1"] == digest:
+                entry["stat"] = list(stat)
+                dirty = True
+                continue
+            stale.append((name, stat, digest))
+
+        self.recomputed = [name for name, _, _ in stale]
+        paths = [os.path.join(self.saves_path, name) for name in self.recomputed]
+        if len(paths) > 1 and self.workers != 1:
+            with ProcessPoolExecutor(max_workers=self.workers or None) as pool:
+                partials = list(pool.map(file_partial, paths))
+        else:
+            partials = [file_partial(p) for p in paths]
+        for (name, stat, digest), partial in zip(stale, partials):
+            self.entries[name] = {"stat": list(stat), "sha1": digest, "partial": partial}
+            dirty = True
+        if dirty:
+            self.save()
+
+        rows = []
+        total = {"subjects": 0, "graded_subjects": 0, "completed_weight": 0.0, "contributed": 0.0,
+                 "average_sum": 0.0, "points_sum": 0.0}
+        for name in sorted(self.entries, key=str.lower):
+            partial = self.entries[name]["partial"]
+            rows.append(summarize(storage.display_name(name), partial))
+            if not partial.get("error"):
+                for key in total:
+                    total[key] += partial[key]
+        return rows, summarize("Overall", total)
+
+    # Writes the cache back
+    def save(self):
+        try:
+            data = json.dumps({"version": CACHE_VERSION, "files": self.entries}, ensure_ascii=False)
+            storage.write_atomic(self.path, data.encode("utf-8"), durable=False)
+        except OSError:
+            pass
+
+
+# Entry point for `python main.py overview <dir>`
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(prog="main.py overview",
+                                     description="Weighted average and GPA across every semester in a saves directory.")
+    parser.add_argument("directory", help="saves directory")
+    parser.add_argument("--format", choices=["csv", "jsonl"], default="csv", help="output format (default: csv)")
+    parser.add_argument("--workers", type=int, default=0, help="worker processes for changed files (default: one per CPU)")
+    args = parser.parse_args(argv)
+    if not os.path.isdir(args.directory):
+        parser.error(f"not a directory: {args.directory}")
+
+    agg = Aggregator(args.directory, args.workers)
+    rows, overall = agg.refresh()
+    rows.append(overall)
+    if args.format == "csv":
+        writer = csv.DictWriter(sys.stdout, fieldnames=FIELDS, lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(rows)
+    else:
+        for row in rows:
+            sys.stdout.write(json.dumps(row, ensure_ascii=False) + "\n")
+    print(f"{len(agg.recomputed)} of {len(rows) - 1} file(s) recomputed", file=sys.stderr)
+    return 1 if any(row["error"] for row in rows) else 0
@@ -0,0 +1,132 @@
+import os
+import queue
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional, Any
+
+from tracing import span
+
+# Quiet period after the last edit before a save is prepared; edits inside it are coalesced
+DEFAULT_DELAY_MS = int(os.environ.get("GRADECALC_AUTOSAVE_MS", "500"))
+
+
+# Debounced autosave: bursts of edits become one save, prepared on the Tk thread and
+# written by a single worker thread so slow disks never block the event loop.
+# prepare() runs on the Tk thread and returns a callable for the worker (or None).
+class AutoSaver:
+    # Starts the writer thread; root is used for after() scheduling
+    def __init__(self, root, prepare: Callable[[], Optional[Callable[[], None]]],
+                 delay_ms: int = DEFAULT_DELAY_MS, on_status: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.root = root
+        self.prepare = prepare
+        self.delay_ms = delay_ms
+        self.max_delay_ms = delay_ms * 4
+        self.on_status = on_status
+        self.timer = None
+        self.poll_timer = None
+        self.first_request = None
+        self.requests = 0
+        self.saves = 0
+        self.busy = False
+        self.error: Optional[BaseException] = None
+        self.latencies = deque(maxlen=50)
+        self.jobs: "queue.Queue" = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name="autosave", daemon=True)
+        self.thread.start()
+
+    # Notes an edit; the save fires once edits pause for delay_ms (or max_delay_ms has passed)
+    def request(self):
+        self.requests += 1
+        now = time.perf_counter()
+        if self.first_request is None:
+            self.first_request = now
+        if self.timer is not None:
+            if (now - self.first_request) * 1000.0 >= self.max_delay_ms:
+                return
+            self.root.after_cancel(self.timer)
+        self.timer = self.root.after(self.delay_ms, self._fire)
+
+    # Prepares the coalesced save on the Tk thread and queues its write
+    def _fire(self):
+        self.timer = None
+        self.first_request = None
+        job = self.prepare()
+        if job is not None:
+            self.jobs.put((time.perf_counter(), job))
+            if self.poll_timer is None:
+                self._poll()
+
+    # Writer thread: runs queued jobs in order and records their latency
+    def _run(self):
+        while True:
+            item = self.jobs.get()
+            try:
+                if item is None:
+                    return
+                queued_at, job = item
+                self.busy = True
+                try:
+                    # jobs are closures built by prepare(), so they are timed here rather than @traced
+                    with span("autosave.job"):
+                        job()
+                    self.saves += 1
+                    self.latencies.append(time.perf_counter() - queued_at)
+                except BaseException as e:
+                    self.error = e
+                finally:
+                    self.busy = False
+            finally:
+                self.jobs.task_done()
+
+    # Reports progress to on_status from the Tk thread until the queue drains
+    def _poll(self):
+        self.poll_timer = None
+        if self.on_status:
+            self.on_status(self.status())
+        if self.queue_depth():
+            self.poll_timer = self.root.after(100, self._poll)
+
+    # Number of saves queued or being written
+    def queue_depth(self) -> int:
+        return self.jobs.qsize() + (1 if self.busy else 0)
+
+    # Save latency (queue + write time) and queue depth figures
+    def status(self) -> Dict[str, Any]:
+        lat = list(self.latencies)
+        return {
+            "queue_depth": self.queue_depth(),
+            "requests": self.requests,
+            "saves": self.saves,
+            "last_latency_ms": lat[-1] * 1000.0 if lat else None,
+            "avg_latency_ms": sum(lat) / len(lat) * 1000.0 if lat else None,
+            "max_latency_ms": max(lat) * 1000.0 if lat else None,
+            "error": self.error,
+        }
+
+    # Re-raises a write error from the worker, once
+    def raise_error(self):
+        if self.error is not None:
+            e, self.error = self.error, None
+            raise e
+
+    # Runs any pending save now and waits until everything queued is on disk
+    def flush(self):
+        if self.timer is not None:
+            self.root.after_cancel(self.timer)
+            self._fire()
+        self.jobs.join()
+        if self.on_status:
+            self.on_status(self.status())
+        self.raise_error()
+
+    # Flushes and stops the writer thread
+    def stop(self):
+        try:
+            self.flush()
+        finally:
+            if self.poll_timer is not None:
+                self.root.after_cancel(self.poll_timer)
+                self.poll_timer = None
+            self.jobs.put(None)
+            self.thread.join()
@@ -0,0 +1,98 @@
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List
+
+from journal import load_readonly
+import storage
+
+FIELDS = ["file", "subject", "completed_weight", "planned_weight", "contributed",
+          "current_avg_completed", "needed_avg_remaining", "remaining_planned_weight",
+          "impossible", "error"]
+
+
+# Finds every save file under root (recursively if asked), sorted for stable output
+def find_save_files(root: str, recursive: bool = False) -> List[str]:
+    if not recursive:
+        return sorted(storage.list_save_files(root))
+    found = []
+    for dirpath, _dirs, files in os.walk(root):
+        found.extend(os.path.join(dirpath, f) for f in files
+                     if not f.startswith(".") and f.lower().endswith(storage.SAVE_EXTENSIONS))
+    return sorted(found)
+
+
+# Worker: loads one semester (plus any pending journal) and returns a stats row per subject
+def file_rows(path: str, pass_mark: float) -> List[Dict[str, Any]]:
+    try:
+        gb = load_readonly(path)
+        rows = []
+        for title in gb.sorted_titles():
+            stats = gb.stats(title, pass_mark=pass_mark)
+            impossible = stats["needed_avg_remaining"] == math.inf
+            rows.append({
+                "file": path,
+                "subject": title,
+                "completed_weight": stats["completed_weight"],
+                "planned_weight": stats["planned_weight"],
+                "contributed": stats["contributed"],
+                "current_avg_completed": stats["current_avg_completed"],
+                "needed_avg_remaining": None if impossible else stats["needed_avg_remaining"],
+                "remaining_planned_weight": stats["remaining_planned_weight"],
+                "impossible": impossible,
+                "error": None,
+            })
+        return rows
+    except Exception as e:
+        return [{**dict.fromkeys(FIELDS), "file": path, "error": f"{type(e).__name__}: {e}"}]
+
+
+# Loads the files across a process pool and streams rows to out as they complete (in file order)
+def run_batch(paths: List[str], pass_mark: float, out, fmt: str = "csv", workers: int = 0) -> int:
+    writer = None
+    if fmt == "csv":
+        writer = csv.DictWriter(out, fieldnames=FIELDS, lineterminator="\n")
+        writer.writeheader()
+    failures = 0
+    chunksize = max(1, len(paths) // ((workers or os.cpu_count() or 1) * 8))
+    with ProcessPoolExecutor(max_workers=workers or None) as pool:
+        for rows in pool.map(file_rows, paths, [pass_mark] * len(paths), chunksize=chunksize):
+            for row in rows:
+                if row["error"]:
+                    failures += 1
+                if writer:
+                    writer.writerow(row)
+                else:
+                    out.write(json.dumps(row, ensure_ascii=False) + "\n")
+    out.flush()
+    return failures
+
+
+# Entry point for `python main.py batch <dir>`
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(prog="main.py batch",
+                                     description="Compute subject statistics for every semester file in a directory.")
+    parser.add_argument("directory", help="saves directory to scan")
+    parser.add_argument("--pass-mark", type=float, default=50.0, help="pass mark in percent (default: 50)")
+    parser.add_argument("--format", choices=["csv", "jsonl"], default="csv", help="output format (default: csv)")
+    parser.add_argument("--workers", type=int, default=0, help="worker processes (default: one per CPU)")
+    parser.add_argument("--output", "-o", help="write to this file instead of stdout")
+    parser.add_argument("--recursive", "-r", action="store_true", help="also scan subdirectories")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.directory):
+        parser.error(f"not a directory: {args.directory}")
+    paths = find_save_files(args.directory, args.recursive)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8", newline="") as out:
+            failures = run_batch(paths, args.pass_mark, out, args.format, args.workers)
+    else:
+        failures = run_batch(paths, args.pass_mark, sys.stdout, args.format, args.workers)
+    if failures:
+        print(f"{failures} file(s) failed to load", file=sys.stderr)
+    return 1 if failures else 0
@@ -0,0 +1,204 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+from models import Assessment, GradeBook
+import calculations
+import storage
+
+DEFAULT_SIZES = [10, 1_000, 100_000]
+DEFAULT_THRESHOLD = 0.25
+# Timings below this are mostly noise and are not compared against the baseline
+NOISE_FLOOR_S = 0.0005
+KINDS = ["Assignment", "Exam", "Quiz", "Project", "Assessment"]
+
+
+# Builds a synthetic gradebook with `assessments` items spread over `subjects` subjects,
+# of which a `completion` share carry a mark. The same arguments always give the same book.
+def generate(assessments: int, subjects: int, completion: float = 0.5, seed: int = 0) -> GradeBook:
+    rng = random.Random(seed)
+    gb = GradeBook()
+    subjects = max(1, min(subjects, assessments or 1))
+    titles = [f"Subject {i:06d}" for i in range(subjects)]
+    for title in titles:
+        gb.add_subject(title)
+    for i in range(assessments):
+        title = titles[i % subjects]
+        mark = round(rng.uniform(20.0, 100.0), 2) if rng.random() < completion else None
+        gb.subjects[title].append(Assessment(f"Item {i}", rng.choice(KINDS), round(rng.uniform(1.0, 40.0), 2), mark))
+    return gb
+
+
+# Runs fn `repeat` times (after `setup`, untimed, each time) and returns the timings in seconds
+def time_it(fn: Callable[[Any], Any], setup: Callable[[], Any], repeat: int) -> List[float]:
+    times = []
+    for _ in range(repeat):
+        arg = setup()
+        gc.collect()
+        start = time.perf_counter()
+        fn(arg)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+# Peak memory allocated while fn runs once, in bytes (measured apart from the timings,
+# since tracing slows allocation down)
+def peak_memory(fn: Callable[[Any], Any], setup: Callable[[], Any]) -> int:
+    arg = setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn(arg)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+# The benchmarked operations for one generated gradebook: name -> (setup, fn).
+# setup() returns the argument fn gets, so state that fn mutates is rebuilt for every run.
+def operations(gb: GradeBook, workdir: str) -> Dict[str, tuple]:
+    titles = gb.sorted_titles()
+    largest = max(titles, key=lambda t: len(gb.subjects[t].assessments))
+    items = list(gb.subjects[largest].assessments)
+    text = gb.as_json()
+    json_path = os.path.join(workdir, "bench.json")
+    binary_path = os.path.join(workdir, "bench.ugcb")
+    with open(json_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    storage.save_binary(gb, binary_path)
+
+    def renamed_copy():
+        copy = GradeBook()
+        copy.load_json(text)
+        return copy
+
+    def rename(book):
+        book.rename_subject(titles[len(titles) // 2], "Renamed subject")
+
+    def load_binary_all(_):
+        book = GradeBook()
+        storage.load_binary(book, binary_path)
+        storage.materialize(book)
+
+    def load_stream(_):
+        with open(json_path, "r", encoding="utf-8") as f:
+            GradeBook().load_stream(f)
+
+    ops = {
+        "compute_stats": (lambda: items, lambda a: calculations.compute_stats(a, 50.0)),
+        "gradebook_stats": (lambda: gb, lambda book: [book.stats(t, 50.0) for t in titles]),
+        "solve_targets": (lambda: items, lambda a: calculations.solve_targets(a, 65.0)),
+        "as_json": (lambda: gb, lambda book: book.as_json()),
+        "load_json": (lambda: text, lambda s: GradeBook().load_json(s)),
+        "load_stream": (lambda: None, load_stream),
+        "encode_binary": (lambda: gb, lambda book: storage.encode_binary(book)),
+        "load_binary_lazy": (lambda: None, lambda _: storage.load_binary(GradeBook(), binary_path)),
+        "load_binary_full": (lambda: None, load_binary_all),
+        "rename_subject": (renamed_copy, rename),
+    }
+    if calculations.HAVE_NUMPY:
+        subjects = [gb.subjects[t].assessments for t in titles]
+        ops["compute_stats_batch"] = (lambda: calculations.pack_assessments(subjects),
+                                      lambda packed: calculations.compute_stats_batch(*packed, pass_mark=50.0))
+        ops["what_if_grid"] = (lambda: items, lambda a: calculations.what_if_grid(a))
+    return ops
+
+
+# Runs every operation for every size and returns the results document
+def run(sizes: List[int], subjects_per: int, completion: float, repeat: int,
+        only: Optional[List[str]] = None, seed: int = 0, log=sys.stderr) -> Dict[str, Any]:
+    results = []
+    workdir = tempfile.mkdtemp(prefix="gradecalc-bench-")
+    try:
+        for size in sizes:
+            subjects = max(1, size // subjects_per)
+            gb = generate(size, subjects, completion, seed)
+            for name, (setup, fn) in operations(gb, workdir).items():
+                if only and name not in only:
+                    continue
+                # big inputs get fewer runs so a full suite stays in minutes
+                runs = max(1, min(repeat, repeat * 10_000 // max(size, 1)))
+                times = time_it(fn, setup, runs)
+                peak = peak_memory(fn, setup)
+                results.append({"name": name, "size": size, "subjects": subjects, "completion": completion,
+                                "runs": runs, "median_s": statistics.median(times), "min_s": min(times),
+                                "peak_bytes": peak})
+                print(f"{name:<26} {size:>9,} items  median {statistics.median(times) * 1000:10.3f} ms  "
+                      f"peak {peak / 1024:10.1f} KiB", file=log)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        "meta": {"python": platform.python_version(), "platform": platform.platform(),
+                 "numpy": calculations.HAVE_NUMPY, "created": time.time(), "seed": seed},
+        "results": results,
+    }
+
+
+# Compares results with a baseline document (best time and peak memory per operation and
+# size); returns one message per regression
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    base = {(r["name"], r["size"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for r in results["results"]:
+        b = base.get((r["name"], r["size"]))
+        if b is None:
+            continue
+        for key, label in (("min_s", "time"), ("peak_bytes", "memory")):
+            if key == "min_s" and max(b[key], r[key]) < NOISE_FLOOR_S:
+                continue
+            if b[key] > 0 and r[key] > b[key] * (1.0 + threshold):
+                regressions.append(f"{r['name']} @ {r['size']:,}: {label} {r[key] / b[key]:.2f}x baseline "
+                                   f"({b[key]:.6g} -> {r[key]:.6g})")
+    return regressions
+
+
+# Benchmarks models, calculations and serialization on synthetic gradebooks
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark core gradebook operations on synthetic data.")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="comma-separated assessment counts (default: %(default)s; up to 1000000)")
+    parser.add_argument("--per-subject", type=int, default=10, help="assessments per subject (default: 10)")
+    parser.add_argument("--completion", type=float, default=0.5, help="share of marked assessments (default: 0.5)")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per operation for small sizes (default: 5)")
+    parser.add_argument("--only", help="comma-separated operation names to run")
+    parser.add_argument("--seed", type=int, default=0, help="generator seed (default: 0)")
+    parser.add_argument("--output", "-o", help="write the results JSON here (default: stdout)")
+    parser.add_argument("--baseline", help="compare against this results JSON")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"allowed slowdown before a regression is reported (default: {DEFAULT_THRESHOLD})")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    only = [s.strip() for s in args.only.split(",")] if args.only else None
+    results = run(sizes, max(1, args.per_subject), args.completion, max(1, args.repeat), only, args.seed)
+
+    data = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(data + "\n")
+    else:
+        print(data)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for message in regressions:
+            print(f"REGRESSION {message}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} of the baseline.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,42 @@
+import importlib.util
 import math
-from typing import List, Dict, Any
-from models import Assessment
+from itertools import compress
+from operator import mul
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+from models import Assessment, AssessmentList
+from tracing import traced
+
+# numpy is slow to import and only the batch paths need it, so only check it exists here;
+# the functions that use it import it when called
+HAVE_NUMPY = importlib.util.find_spec("numpy") is not None
 
          
 # Calculates statistics like current average and needed marks
+@traced
 def compute_stats(assessments: List[Assessment], pass_mark: float = 50.0) -> Dict[str, Any]:
+    if isinstance(assessments, AssessmentList):
+        # read the columns directly (NaN is no mark) instead of building an Assessment per item
+        weights, marks = assessments.weights, assessments.marks
+        done = [m == m for m in marks]
+        completed_weight = sum(compress(weights, done))
+        contributed = sum(map(mul, compress(weights, done), compress(marks, done))) / 100.0
+        planned_weight = sum(weights)
+        return stats_from_totals(completed_weight, planned_weight, contributed, pass_mark)
     completed = [a for a in assessments if a.mark is not None]
     completed_weight = sum(a.weight for a in completed)
     contributed = sum(a.weight * (a.mark / 100.0) for a in completed)
+    planned_weight = sum(a.weight for a in assessments)
+    return stats_from_totals(completed_weight, planned_weight, contributed, pass_mark)
+
 
+# Derives the full statistics from the three running totals of a subject
+def stats_from_totals(completed_weight: float, planned_weight: float, contributed: float,
+                      pass_mark: float = 50.0) -> Dict[str, Any]:
     if completed_weight > 1e-9:
         current_avg_completed = (contributed / completed_weight) * 100.0
     else:
         current_avg_completed = None
 
-    planned_weight = sum(a.weight for a in assessments)
     remaining_planned_weight = max(0.0, 100.0 - completed_weight)
 
     if remaining_planned_weight <= 1e-9:
@@ -36,3 +58,182 @@ def compute_stats(assessments: List[Assessment], pass_mark: float = 50.0) -> Dic
         "needed_avg_remaining": needed_avg_remaining,
         "remaining_planned_weight": remaining_planned_weight,
     }
+
+
+# Splits the marks still needed to reach target across the unmarked assessments, never asking
+# for more than 100 on any of them. Each pending item i is asked for min(100, level * ease_i),
+# with the smallest level that reaches the target (water-filling over the weights):
+#   ease=None          every item gets the same mark, which minimises the highest mark needed
+#   ease={kind: e}     marks scale with e per kind (give harder kinds a lower e; unlisted kinds use 1)
+# Weight not listed yet (100 minus the planned weight) counts as one more pending item with
+# ease 1, as the remaining weight does in stats_from_totals.
+# Runs in O(n log n). Returns pending (indices), marks (one per pending item), unlisted_weight,
+# unlisted_mark (the mark asked of the unlisted weight), max_mark, feasible, best_final (the
+# final mark with 100 on everything left) and shortfall (how far best_final falls short of
+# target, 0 when feasible).
+@traced
+def solve_targets(assessments: Sequence[Assessment], target: float,
+                  ease: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    if isinstance(assessments, AssessmentList):
+        items = zip(assessments.weights, assessments.marks, assessments.kinds)
+        rows = [(w, None if m != m else m, k) for w, m, k in items]
+    else:
+        rows = [(a.weight, a.mark, a.kind) for a in assessments]
+    contributed = sum(w * (m / 100.0) for w, m, _ in rows if m is not None)
+    pending = [i for i, (_, m, _) in enumerate(rows) if m is None]
+    weights = [rows[i][0] / 100.0 for i in pending]
+    factors = [max((ease or {}).get(rows[i][2], 1.0), 1e-9) for i in pending]
+    unlisted = max(0.0, 100.0 - sum(w for w, _, _ in rows))
+    if unlisted > 1e-9:
+        weights.append(unlisted / 100.0)
+        factors.append(1.0)
+
+    best_final = contributed + sum(weights) * 100.0
+    required = target - contributed
+    result = {"pending": pending, "marks": [0.0] * len(pending), "unlisted_weight": unlisted,
+              "unlisted_mark": 0.0, "max_mark": 0.0, "feasible": True,
+              "best_final": best_final, "shortfall": 0.0}
+    if required <= 1e-9:
+        return result
+    if best_final < target - 1e-9:
+        marks = [100.0 if w > 0 else 0.0 for w in weights]
+        result.update(marks=marks[:len(pending)], unlisted_mark=100.0 if unlisted > 1e-9 else 0.0,
+                      max_mark=100.0 if weights else 0.0, feasible=False, shortfall=target - best_final)
+        return result
+
+    # level at which each item reaches 100, in increasing order
+    order = sorted(range(len(weights)), key=lambda j: 100.0 / factors[j])
+    slope = sum(w * f for w, f in zip(weights, factors))
+    capped = 0.0
+    level = 0.0
+    for j in order:
+        cap_level = 100.0 / factors[j]
+        if slope > 0 and capped + slope * cap_level >= required - 1e-12:
+            level = (required - capped) / slope
+            break
+        capped += weights[j] * 100.0
+        slope -= weights[j] * factors[j]
+        level = cap_level
+    marks = [min(100.0, level * f) for f in factors]
+    result.update(marks=marks[:len(pending)], unlisted_mark=marks[-1] if unlisted > 1e-9 else 0.0,
+                  max_mark=max(m for w, m in zip(weights, marks) if w > 0) if any(weights) else 0.0)
+    return result
+
+
+# Packs many subjects' assessments into padded (subjects x items) weight/mark/mask arrays
+def pack_assessments(subjects: Sequence[Sequence[Assessment]]) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    if not HAVE_NUMPY:
+        raise RuntimeError("Batch statistics require numpy (pip install numpy).")
+    import numpy as np
+    width = max((len(s) for s in subjects), default=0)
+    weights = np.zeros((len(subjects), width), dtype=np.float64)
+    marks = np.zeros((len(subjects), width), dtype=np.float64)
+    mask = np.zeros((len(subjects), width), dtype=bool)
+    for i, assessments in enumerate(subjects):
+        if isinstance(assessments, AssessmentList):
+            n = len(assessments)
+            if n:
+                row_marks = np.frombuffer(assessments.marks, dtype=np.float64)
+                weights[i, :n] = np.frombuffer(assessments.weights, dtype=np.float64)
+                mask[i, :n] = ~np.isnan(row_marks)
+                marks[i, :n] = np.nan_to_num(row_marks, nan=0.0)
+            continue
+        for j, a in enumerate(assessments):
+            weights[i, j] = a.weight
+            if a.mark is not None:
+                marks[i, j] = a.mark
+                mask[i, j] = True
+    return weights, marks, mask
+
+
+# Vectorized needed_avg_remaining of stats_from_totals; the arguments broadcast against each other
+def needed_average(completed_weight, contributed, pass_mark) -> "np.ndarray":
+    import numpy as np
+    completed_weight = np.asarray(completed_weight, dtype=np.float64)
+    contributed = np.asarray(contributed, dtype=np.float64)
+    pass_mark = np.asarray(pass_mark, dtype=np.float64)
+    remaining_planned_weight = np.maximum(0.0, 100.0 - completed_weight)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        needed = (pass_mark - contributed) / (remaining_planned_weight / 100.0)
+    needed = np.clip(needed, 0.0, 9999.0)
+    finished = np.where(contributed >= pass_mark - 1e-9, 0.0, math.inf)
+    return np.where(remaining_planned_weight <= 1e-9, finished, needed)
+
+
+# Vectorized compute_stats over many subjects at once.
+# weights/marks/mask are (subjects x items) arrays; mask marks the completed items and
+# padding slots must have weight 0. Returns the same keys as compute_stats as arrays,
+# with current_avg_completed set to NaN where compute_stats would return None.
+def compute_stats_batch(weights, marks, mask, pass_mark=50.0) -> Dict[str, Any]:
+    if not HAVE_NUMPY:
+        raise RuntimeError("Batch statistics require numpy (pip install numpy).")
+    import numpy as np
+    weights = np.asarray(weights, dtype=np.float64)
+    marks = np.asarray(marks, dtype=np.float64)
+    mask = np.asarray(mask, dtype=bool)
+    pass_mark = np.asarray(pass_mark, dtype=np.float64)
+
+    done_weights = np.where(mask, weights, 0.0)
+    completed_weight = done_weights.sum(axis=-1)
+    contributed = (done_weights * np.where(mask, marks, 0.0)).sum(axis=-1) / 100.0
+    planned_weight = weights.sum(axis=-1)
+
+    has_completed = completed_weight > 1e-9
+    with np.errstate(divide="ignore", invalid="ignore"):
+        current_avg_completed = np.where(has_completed, contributed / completed_weight * 100.0, np.nan)
+
+    remaining_planned_weight = np.maximum(0.0, 100.0 - completed_weight)
+    needed_avg_remaining = needed_average(completed_weight, contributed, pass_mark)
+
+    return {
+        "completed_weight": completed_weight,
+        "planned_weight": planned_weight,
+        "contributed": contributed,
+        "current_avg_completed": current_avg_completed,
+        "needed_avg_remaining": needed_avg_remaining,
+        "remaining_planned_weight": remaining_planned_weight,
+    }
+
+
+# Default what-if axes: every target from 0 to 100 in 0.5 steps, hypothetical marks in 5s
+WHAT_IF_TARGETS = (0.0, 100.0, 0.5)
+WHAT_IF_MARKS = (0.0, 100.0, 5.0)
+
+
+# Computes the what-if surface for one subject in a single broadcast pass:
+#   needed     (targets,)                  average needed on the remaining weight per target
+#   scenarios  (pending, marks, targets)   the same if pending item i scored marks[j]
+# pending holds the indices of the unmarked assessments, in order.
+@traced
+def what_if_grid(assessments: Sequence[Assessment], targets=None, marks=None) -> Dict[str, Any]:
+    if not HAVE_NUMPY:
+        raise RuntimeError("What-if scenarios require numpy (pip install numpy).")
+    import numpy as np
+    if targets is None:
+        start, stop, step = WHAT_IF_TARGETS
+        targets = np.arange(start, stop + step / 2, step)
+    if marks is None:
+        start, stop, step = WHAT_IF_MARKS
+        marks = np.arange(start, stop + step / 2, step)
+    targets = np.asarray(targets, dtype=np.float64)
+    marks = np.asarray(marks, dtype=np.float64)
+
+    weights, item_marks, mask = pack_assessments([assessments])
+    weights, item_marks, mask = weights[0], item_marks[0], mask[0]
+    completed_weight = weights[mask].sum()
+    contributed = (weights[mask] * item_marks[mask]).sum() / 100.0
+    pending = np.flatnonzero(~mask)
+    pending_weights = weights[pending]
+
+    needed = needed_average(completed_weight, contributed, targets)
+    scenarios = needed_average(
+        (completed_weight + pending_weights)[:, None, None],
+        contributed + pending_weights[:, None, None] * marks[None, :, None] / 100.0,
+        targets[None, None, :])
+    return {
+        "targets": targets,
+        "marks": marks,
+        "pending": pending.tolist(),
+        "needed": needed,
+        "scenarios": scenarios,
+    }
@@ -0,0 +1,289 @@
+import argparse
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Optional
+
+from models import Assessment, GradeBook
+from journal import Journal, discard, load_readonly
+import storage
+
+SUBJECT = "Crash test"
+
+
+# The gradebook after n acknowledged edits; every state a save can legitimately hold is one of these
+def expected(n: int) -> GradeBook:
+    gb = GradeBook()
+    gb.add_subject(SUBJECT)
+    for i in range(n):
+        gb.subjects[SUBJECT].append(_item(i))
+    return gb
+
+
+# The i-th edit's assessment
+def _item(i: int) -> Assessment:
+    return Assessment(f"Item {i}", "Exam", 1.0 + i % 7, float(i % 101))
+
+
+# Returns n if gb is exactly expected(n) for some n, else None (a torn or mixed save)
+def state_index(gb: GradeBook) -> Optional[int]:
+    if list(gb.subjects) != [SUBJECT]:
+        return None
+    items = list(gb.subjects[SUBJECT].assessments)
+    if any(a != _item(i) for i, a in enumerate(items)):
+        return None
+    return len(items)
+
+
+# Child process: keeps editing the save file through a journal with small compactions and
+# prints the number of edits after each one is on disk, until it is killed
+def child(path: str, compact_bytes: int):
+    gb = GradeBook()
+    if os.path.exists(path):
+        storage.load_path(gb, path)
+    else:
+        gb.add_subject(SUBJECT)
+        storage.save_path(gb, path)
+    j = Journal(path, gb, compact_bytes=compact_bytes)
+    j.replay()
+    n = len(gb.subjects[SUBJECT].assessments)
+    while True:
+        gb.add_assessment(SUBJECT, _item(n))
+        n += 1
+        j.flush()
+        if j.needs_compaction():
+            j.compact()
+        sys.stdout.write(f"{n}\n")
+        sys.stdout.flush()
+
+
+# Kills a writer child at random moments and checks that what is on disk afterwards is a
+# complete state holding at least every acknowledged edit. Returns the failures.
+def kill_test(path: str, rounds: int, max_delay: float, compact_bytes: int, rng: random.Random,
+              log=sys.stderr) -> List[str]:
+    failures = []
+    acked = 0
+    for r in range(rounds):
+        proc = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--child", path,
+                                 "--compact-bytes", str(compact_bytes)],
+                                stdout=subprocess.PIPE, text=True)
+        time.sleep(rng.uniform(0.0, max_delay))
+        proc.kill()
+        out, _ = proc.communicate()
+        lines = out.split()
+        if lines:
+            acked = int(lines[-1])
+        if not os.path.exists(path) and acked == 0:
+            continue  # killed before the first save
+        try:
+            n = state_index(load_readonly(path))
+        except Exception as e:
+            failures.append(f"round {r}: save does not load ({type(e).__name__}: {e})")
+            break
+        if n is None:
+            failures.append(f"round {r}: save holds a torn or mixed state")
+            break
+        if n < acked:
+            failures.append(f"round {r}: {acked} edit(s) acknowledged but only {n} on disk")
+            break
+        acked = n
+        if r % 10 == 9:
+            print(f"{os.path.basename(path)}: {r + 1} kills, {n} edits intact", file=log)
+    return failures
+
+
+# Raised by the injected faults below
+class InjectedCrash(Exception):
+    pass
+
+
+# Replaces os.fsync, os.replace and file writes with versions that crash at the n-th call
+# (a write crashes halfway through its data), then checks that the interrupted save left
+# either the old or the new content and no temp file. Returns the failures.
+def fault_test(workdir: str, log=sys.stderr) -> List[str]:
+    failures = []
+    real_fsync, real_replace, real_fdopen = os.fsync, os.replace, os.fdopen
+    calls = [0, -1]
+
+    def tick():
+        calls[0] += 1
+        if calls[0] == calls[1]:
+            raise InjectedCrash()
+
+    def fsync(fd):
+        tick()
+        real_fsync(fd)
+
+    def replace(src, dst):
+        tick()
+        real_replace(src, dst)
+
+    class TornFile:
+        def __init__(self, f):
+            self.f = f
+
+        def write(self, data):
+            calls[0] += 1
+            if calls[0] == calls[1]:
+                self.f.write(data[:len(data) // 2])
+                self.f.flush()
+                raise InjectedCrash()
+            return self.f.write(data)
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return self.f.__exit__(*exc)
+
+        def __getattr__(self, name):
+            return getattr(self.f, name)
+
+    def fdopen(fd, *args, **kwargs):
+        return TornFile(real_fdopen(fd, *args, **kwargs))
+
+    for ext in storage.SAVE_EXTENSIONS:
+        path = os.path.join(workdir, "faults" + ext)
+        old, new = expected(50), expected(80)
+        step = 1
+        while True:
+            storage.save_path(old, path)
+            calls[0], calls[1] = 0, step
+            os.fsync, os.replace, os.fdopen = fsync, replace, fdopen
+            try:
+                storage.save_path(new, path)
+                crashed = False
+            except InjectedCrash:
+                crashed = True
+            finally:
+                os.fsync, os.replace, os.fdopen = real_fsync, real_replace, real_fdopen
+            try:
+                n = state_index(load_readonly(path))
+                held = "a torn or mixed state" if n is None else f"{n} items"
+            except Exception as e:
+                n, held = None, f"an unreadable file ({type(e).__name__})"
+            if n not in (50, 80) or (not crashed and n != 80):
+                failures.append(f"{ext} fault at call {step}: save holds {held}")
+            leftovers = [name for name in os.listdir(workdir) if name.endswith(".tmp")]
+            if leftovers:
+                failures.append(f"{ext} fault at call {step}: temp files left behind: {leftovers}")
+                for name in leftovers:
+                    os.remove(os.path.join(workdir, name))
+            if not crashed:
+                break
+            step += 1
+        print(f"{ext}: injected a crash at each of {step - 1} write steps", file=log)
+    return failures
+
+
+# Tears a journal append at every byte of the record, restarts like the editor does and
+# makes more edits, then checks they all survive: a torn tail must not swallow later appends.
+# Returns the failures.
+def journal_fault_test(workdir: str, log=sys.stderr) -> List[str]:
+    failures = []
+    cut = [0]
+
+    class TornAppend:
+        def __init__(self, f):
+            self.f = f
+
+        def write(self, data):
+            if cut[0] < len(data):
+                self.f.write(data[:cut[0]])
+                raise InjectedCrash()
+            return self.f.write(data)
+
+        def __getattr__(self, name):
+            return getattr(self.f, name)
+
+    def torn_open(path, mode="r", *args, **kwargs):
+        f = open(path, mode, *args, **kwargs)
+        return TornAppend(f) if "a" in mode else f
+
+    for ext in storage.SAVE_EXTENSIONS:
+        path = os.path.join(workdir, "journal" + ext)
+        cut[0] = 0
+        while True:
+            storage.save_path(expected(50), path)
+            discard(path)
+            gb = GradeBook()
+            storage.load_path(gb, path)
+            j = Journal(path, gb)
+            gb.add_assessment(SUBJECT, _item(50))
+            j.flush()
+            gb.add_assessment(SUBJECT, _item(51))
+            storage.open = torn_open
+            try:
+                j.flush()
+                crashed = False
+            except InjectedCrash:
+                crashed = True
+            finally:
+                del storage.open
+            gb.listeners.remove(j.record)
+
+            gb = GradeBook()
+            storage.load_path(gb, path)
+            j = Journal(path, gb)
+            j.replay()
+            n = len(gb.subjects[SUBJECT].assessments)
+            for i in range(n, n + 3):
+                gb.add_assessment(SUBJECT, _item(i))
+            j.close()
+            try:
+                held = state_index(load_readonly(path))
+            except Exception as e:
+                held = f"an unreadable file ({type(e).__name__})"
+            if n not in (51, 52) or (not crashed and n != 52):
+                failures.append(f"{ext} append torn at byte {cut[0]}: replay gave {n} items")
+            elif held != n + 3:
+                failures.append(f"{ext} append torn at byte {cut[0]}: {n + 3} items acknowledged, save holds {held}")
+            if not crashed:
+                break
+            cut[0] += 1
+        print(f"{ext}: tore a journal append at each of {cut[0]} bytes", file=log)
+    return failures
+
+
+# Crash-injection harness for the durable write path: fault injection at every write step
+# and journal append, then repeated SIGKILLs of a process editing JSON and binary save files
+def main():
+    parser = argparse.ArgumentParser(description="Check that saves survive crashes at any point.")
+    parser.add_argument("--rounds", type=int, default=50, help="kills per save format (default: 50)")
+    parser.add_argument("--max-delay", type=float, default=0.3, help="longest run before a kill, in s (default: 0.3)")
+    parser.add_argument("--compact-bytes", type=int, default=2048,
+                        help="journal size that triggers a snapshot in the child (default: 2048)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for kill timing (default: 0)")
+    parser.add_argument("--dir", help="work directory (default: a new temp directory, removed afterwards)")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.compact_bytes)
+        return
+
+    workdir = args.dir or tempfile.mkdtemp(prefix="gradecalc-crash-")
+    os.makedirs(workdir, exist_ok=True)
+    rng = random.Random(args.seed)
+    try:
+        failures = fault_test(workdir)
+        failures += journal_fault_test(workdir)
+        for ext in storage.SAVE_EXTENSIONS:
+            path = os.path.join(workdir, "killed" + ext)
+            failures += kill_test(path, args.rounds, args.max_delay, args.compact_bytes, rng)
+    finally:
+        if not args.dir:
+            shutil.rmtree(workdir, ignore_errors=True)
+    for message in failures:
+        print(f"FAIL {message}", file=sys.stderr)
+    if failures:
+        sys.exit(1)
+    print("No torn or lost saves.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
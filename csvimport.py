@@ -0,0 +1,262 @@
+import argparse
+import csv
+import math
+import os
+import sys
+from typing import Dict, List, Optional, TextIO, Tuple
+
+from models import GradeBook, Subject, MAX_WEIGHT, parse_mark, parse_weight
+from tracing import traced
+
+HAVE_NUMPY = True
+try:
+    import numpy as np
+except Exception:
+    HAVE_NUMPY = False
+
+CHUNK_ROWS = 10_000
+# Per-row errors kept for the report; the rest are only counted
+MAX_REPORTED_ERRORS = 1000
+DEFAULT_KIND = "Assessment"
+
+
+# Parses a chunk of weight and mark strings. Returns (weights, marks, errors): marks use None
+# for blank, and errors maps the row offset of every invalid row to its message.
+# With numpy the whole chunk is converted and bounds-checked at once; only rows the fast
+# path rejects go through parse_weight/parse_mark, to get the same messages as the dialog.
+def parse_chunk(weight_texts: List[str], mark_texts: List[str]):
+    n = len(weight_texts)
+    if not HAVE_NUMPY or n == 0:
+        return _parse_rows(weight_texts, mark_texts, range(n))
+
+    weight_arr = np.char.strip(np.asarray(weight_texts, dtype=str))
+    mark_arr = np.char.strip(np.asarray(mark_texts, dtype=str))
+    try:
+        weights = weight_arr.astype(np.float64)
+        blank = mark_arr == ""
+        fraction = np.char.find(mark_arr, "/") >= 0
+        plain = ~blank & ~fraction
+        marks = np.full(n, np.nan)
+        marks[plain] = mark_arr[plain].astype(np.float64)
+        if fraction.any():
+            parts = np.char.partition(mark_arr[fraction], "/")
+            num = np.char.strip(parts[:, 0]).astype(np.float64)
+            denom = np.char.strip(parts[:, 2]).astype(np.float64)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                marks[fraction] = np.where(denom > 0, num / denom * 100.0, np.nan)
+            bad_fraction = np.zeros(n, dtype=bool)
+            bad_fraction[fraction] = ~(denom > 0)
+        else:
+            bad_fraction = np.zeros(n, dtype=bool)
+    except ValueError:
+        # something in the chunk isn't a plain number or a simple fraction
+        return _parse_rows(weight_texts, mark_texts, range(n))
+
+    bad = ~((weights >= 0.0) & (weights <= MAX_WEIGHT))
+    bad |= ~blank & (bad_fraction | ~((marks >= 0.0) & (marks <= 100.0)))
+    bad_rows = np.flatnonzero(bad)
+    weight_list = weights.tolist()
+    mark_list = [None if b else m for b, m in zip(blank.tolist(), marks.tolist())]
+    errors = {}
+    if len(bad_rows):
+        _, _, errors = _parse_rows(weight_texts, mark_texts, bad_rows.tolist())
+    return weight_list, mark_list, errors
+
+
+# Slow path of parse_chunk: parses the given rows one by one
+def _parse_rows(weight_texts: List[str], mark_texts: List[str], rows):
+    weights: List[Optional[float]] = [None] * len(weight_texts)
+    marks: List[Optional[float]] = [None] * len(weight_texts)
+    errors = {}
+    for i in rows:
+        try:
+            weights[i] = parse_weight(weight_texts[i])
+        except ValueError as e:
+            errors[i] = str(e)
+            continue
+        try:
+            marks[i] = parse_mark(mark_texts[i])
+        except Exception as e:
+            errors[i] = f"Mark must be a number (e.g., 75) or fraction (e.g., 14/20): {e}"
+    return weights, marks, errors
+
+
+# Outcome of an import: counts plus the first MAX_REPORTED_ERRORS (line, message) pairs
+class ImportReport:
+    def __init__(self):
+        self.rows = 0
+        self.imported = 0
+        self.failed = 0
+        self.subjects_created: List[str] = []
+        self.errors: List[Tuple[int, str]] = []
+
+    # Records one rejected row
+    def error(self, line: int, message: str):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+    # One-line summary
+    def summary(self) -> str:
+        text = f"Imported {self.imported} of {self.rows} row(s)"
+        if self.subjects_created:
+            text += f" into {len(self.subjects_created)} new subject(s)"
+        if self.failed:
+            text += f"; {self.failed} row(s) rejected"
+        return text + "."
+
+
+# Streams assessment rows from a CSV file into a gradebook, CHUNK_ROWS at a time.
+# The header names the columns (subject, name, kind, weight, mark; any order, any case);
+# without a subject column every row goes to default_subject. Rows are appended directly,
+# without notifying listeners, so the caller saves the whole gradebook once at the end.
+class CsvImporter:
+    def __init__(self, gb: GradeBook, fp: TextIO, default_subject: Optional[str] = None,
+                 chunk_rows: int = CHUNK_ROWS):
+        self.gb = gb
+        self.reader = csv.reader(fp)
+        self.default_subject = default_subject
+        self.chunk_rows = chunk_rows
+        self.report = ImportReport()
+        self.done = False
+        self.columns = self._read_header()
+
+    # Maps column names to positions and checks the required ones are there
+    def _read_header(self):
+        header = next(self.reader, None)
+        if header is None:
+            raise ValueError("The CSV file is empty.")
+        columns = {name.strip().lower(): i for i, name in enumerate(header)}
+        missing = [c for c in ("name", "weight") if c not in columns]
+        if "subject" not in columns and self.default_subject is None:
+            missing.append("subject")
+        if missing:
+            raise ValueError(f"The CSV header is missing column(s): {', '.join(missing)}.")
+        self.width = max(columns.values()) + 1
+        self.required = max(columns["name"], columns["weight"]) + 1
+        return columns
+
+    # Reads up to chunk_rows non-blank rows, padded to the header's width.
+    # Returns (rows, line numbers, offsets of rows missing a required cell).
+    def _next_rows(self) -> Tuple[List[List[str]], List[int], set]:
+        rows, lines, short = [], [], set()
+        width, required, reader = self.width, self.required, self.reader
+        for row in reader:
+            n = len(row)
+            if n < width:
+                if not any(cell.strip() for cell in row):
+                    continue
+                if n < required:
+                    short.add(len(rows))
+                row += [""] * (width - n)
+            rows.append(row)
+            lines.append(reader.line_num)
+            if len(rows) >= self.chunk_rows:
+                break
+        return rows, lines, short
+
+    # Cells of one column across a chunk (or default for a column the file doesn't have)
+    def _column(self, rows: List[List[str]], name: str, default: str = "") -> List[str]:
+        i = self.columns.get(name)
+        if i is None:
+            return [default] * len(rows)
+        return [row[i] for row in rows]
+
+    # Imports the next chunk; returns False once the file is exhausted
+    @traced
+    def step(self) -> bool:
+        if self.done:
+            return False
+        rows, lines, short = self._next_rows()
+        if not rows:
+            self.done = True
+            return False
+        report = self.report
+        report.rows += len(rows)
+        weights, marks, errors = parse_chunk(self._column(rows, "weight"), self._column(rows, "mark"))
+        names = self._column(rows, "name")
+        kinds = self._column(rows, "kind")
+        titles = self._column(rows, "subject", self.default_subject or "")
+        # rows are gathered per subject and appended as columns once the chunk is parsed
+        pending: Dict[str, Tuple[List[str], List[str], List[float], List[float]]] = {}
+        columns, last_title = None, None
+        for k, line in enumerate(lines):
+            if k in short:
+                report.error(line, "Row has too few columns.")
+                continue
+            if k in errors:
+                report.error(line, errors[k])
+                continue
+            name = names[k].strip()
+            if not name:
+                report.error(line, "Please enter a name for the assessment.")
+                continue
+            title = titles[k].strip()
+            if title != last_title:
+                if not title:
+                    report.error(line, "Subject is empty.")
+                    continue
+                columns = pending.get(title)
+                if columns is None:
+                    columns = pending[title] = ([], [], [], [])
+                last_title = title
+            mark = marks[k]
+            columns[0].append(name)
+            columns[1].append(kinds[k].strip() or DEFAULT_KIND)
+            columns[2].append(weights[k])
+            columns[3].append(math.nan if mark is None else mark)
+            report.imported += 1
+        for title, columns in pending.items():
+            subj = self.gb.subjects.get(title)
+            if subj is None:
+                subj = Subject(title=title)
+                self.gb.put_subject(subj)
+                report.subjects_created.append(title)
+            subj.extend_columns(*columns)
+        return True
+
+    # Imports everything that is left
+    def run(self) -> ImportReport:
+        while self.step():
+            pass
+        return self.report
+
+
+# Imports a CSV file into a gradebook in one go; returns the report
+def import_csv(gb: GradeBook, fp: TextIO, default_subject: Optional[str] = None,
+               chunk_rows: int = CHUNK_ROWS) -> ImportReport:
+    return CsvImporter(gb, fp, default_subject, chunk_rows).run()
+
+
+# Entry point for `python main.py import <save file> <csv>`
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(prog="main.py import",
+                                     description="Append assessments from a CSV file to a semester save file.")
+    parser.add_argument("save", help="semester save file (.json or .ugcb); created if missing")
+    parser.add_argument("csv", help="CSV file with subject,name,kind,weight,mark columns")
+    parser.add_argument("--subject", help="subject for every row when the CSV has no subject column")
+    args = parser.parse_args(argv)
+
+    import storage
+    from journal import Journal
+    gb = GradeBook()
+    if os.path.exists(args.save):
+        storage.load_path(gb, args.save)
+    j = Journal(args.save, gb)
+    if os.path.exists(args.save):
+        j.replay()
+    try:
+        with open(args.csv, "r", encoding="utf-8-sig", newline="") as f:
+            report = import_csv(gb, f, args.subject)
+    except (OSError, ValueError, csv.Error) as e:
+        j.close()
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    j.compact()
+    j.close()
+    for line, message in report.errors:
+        print(f"line {line}: {message}", file=sys.stderr)
+    if report.failed > len(report.errors):
+        print(f"... and {report.failed - len(report.errors)} more", file=sys.stderr)
+    print(report.summary(), file=sys.stderr)
+    return 1 if report.failed else 0
@@ -0,0 +1,248 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from models import GradeBook
+from tracing import traced
+import storage
+
+# Journals larger than this are folded back into a full snapshot
+DEFAULT_COMPACT_BYTES = 256 * 1024
+JOURNAL_EXT = ".journal"
+
+
+# Returns the journal path that belongs to a save file
+def journal_path(save_path: str) -> str:
+    return save_path + JOURNAL_EXT
+
+
+# Hashes a file in chunks without loading it all into memory
+def file_digest(path: str) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# Cheap identity of a save file: [size, mtime_ns, inode]. Saves replace the file, so a new
+# snapshot gets a new inode; None where the filesystem has no inode numbers to trust.
+def file_identity(path: str) -> Optional[List[int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    if not st.st_ino:
+        return None
+    return [st.st_size, st.st_mtime_ns, st.st_ino]
+
+
+# Removes the journal of a save file, if any
+def discard(save_path: str):
+    try:
+        os.remove(journal_path(save_path))
+    except OSError:
+        pass
+
+
+# Loads a save file plus any pending journal without modifying either (for headless readers)
+def load_readonly(path: str) -> GradeBook:
+    gb = GradeBook()
+    storage.load_path(gb, path)
+    j = Journal(path, gb)
+    j.replay(discard_stale=False)
+    j.close()
+    return gb
+
+
+# Append-only log of gradebook mutations kept next to a save file.
+# The first line identifies the snapshot the log applies to, so a journal left over from
+# before a completed compaction is recognised as stale and ignored. The check uses the
+# file's identity (see file_identity) and only hashes the whole save file when that
+# doesn't match and the header has a SHA-1 to compare, e.g. after the files were copied.
+class Journal:
+    # Creates a journal for save_path and subscribes it to the gradebook's mutations.
+    # durable=None follows storage.DURABLE; it applies to appends, rewrites and snapshots.
+    def __init__(self, save_path: str, gb: GradeBook, compact_bytes: int = DEFAULT_COMPACT_BYTES,
+                 durable: Optional[bool] = None):
+        self.save_path = save_path
+        self.path = journal_path(save_path)
+        self.gb = gb
+        self.compact_bytes = compact_bytes
+        self.durable = durable
+        self.pending: List[str] = []
+        self.since_snapshot: Optional[List[str]] = None
+        self.lock = threading.Lock()
+        self.worker: Optional[threading.Thread] = None
+        self.error: Optional[BaseException] = None
+        self.base: Optional[str] = None
+        try:
+            self.size = os.path.getsize(self.path)
+        except OSError:
+            self.size = 0
+        gb.listeners.append(self.record)
+
+    # Listener hook: buffers one mutation record until the next flush()
+    def record(self, op: str, args: Dict[str, Any]):
+        self.pending.append(json.dumps({"op": op, "args": args}, ensure_ascii=False) + "\n")
+
+    # Re-applies the journal on top of a freshly loaded snapshot; returns the number of records applied.
+    # A stale journal is deleted, and one with a torn or corrupt tail cut back to its last good
+    # record, unless discard_stale is False (read-only callers).
+    @traced
+    def replay(self, discard_stale: bool = True) -> int:
+        if not os.path.exists(self.path):
+            return 0
+        with open(self.path, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+        try:
+            header = json.loads(lines[0]) if lines else {}
+            base, identity = header.get("base"), header.get("file")
+        except (ValueError, AttributeError):
+            base, identity = None, None
+        current = file_identity(self.save_path)
+        if current is not None and identity == current:
+            valid = True
+        else:
+            valid = base is not None and os.path.exists(self.save_path) and base == file_digest(self.save_path)
+        if not valid:
+            if discard_stale:
+                discard(self.save_path)
+                self.size = 0
+            return 0
+        self.base = base
+        self.gb.listeners.remove(self.record)
+        applied = 0
+        try:
+            for line in lines[1:]:
+                if not line.endswith("\n"):
+                    break  # torn final append
+                try:
+                    entry = json.loads(line)
+                    self.gb.apply(entry["op"], entry["args"])
+                except (ValueError, KeyError, IndexError, TypeError):
+                    break  # corrupt record: keep the consistent prefix
+                applied += 1
+        finally:
+            self.gb.listeners.append(self.record)
+        if applied < len(lines) - 1 and discard_stale:
+            # cut the bad tail off, or later appends would land behind it and never replay
+            with self.lock:
+                self._rewrite(base, lines[1:1 + applied])
+        return applied
+
+    # Hands over the buffered records (call on the thread that mutates the gradebook)
+    def take(self) -> List[str]:
+        lines, self.pending = self.pending, []
+        return lines
+
+    # Appends records to the journal file (durable overrides the journal's setting for this
+    # call); safe to call from a writer thread
+    @traced
+    def write(self, lines: List[str], durable: Optional[bool] = None):
+        if not lines:
+            return
+        with self.lock:
+            if not os.path.exists(self.path):
+                base = self.base
+                if base is None and file_identity(self.save_path) is None:
+                    base = file_digest(self.save_path)  # nothing cheaper to recognise the snapshot by
+                self._rewrite(base, [])
+            storage.append_durable(self.path, "".join(lines).encode("utf-8"),
+                                   self.durable if durable is None else durable)
+            self.size += sum(len(line) for line in lines)
+            if self.since_snapshot is not None:
+                self.since_snapshot.extend(lines)
+
+    # Appends buffered records to the journal file
+    def flush(self, durable: Optional[bool] = None):
+        self.write(self.take(), durable)
+
+    # True once the journal has grown past the compaction threshold
+    def needs_compaction(self) -> bool:
+        if self.worker is not None and self.worker.is_alive():
+            return False
+        return self.size > self.compact_bytes
+
+    # Serializes the snapshot a compaction will write and starts collecting the records
+    # made meanwhile; pass the result to write_snapshot()
+    def prepare_compaction(self) -> bytes:
+        data = storage.encode_snapshot(self.gb, self.save_path)
+        with self.lock:
+            self.since_snapshot = []
+        return data
+
+    # Folds the journal into a full snapshot. The snapshot is serialized here; with
+    # background=True the disk write happens on a worker thread while edits keep journaling.
+    def compact(self, background: bool = False):
+        self.flush()
+        self.wait()
+        data = self.prepare_compaction()
+        if background:
+            self.worker = threading.Thread(target=self._write_snapshot_logged, args=(data,), daemon=True)
+            self.worker.start()
+        else:
+            self.write_snapshot(data)
+
+    # Replaces the save file with a snapshot and drops the pending records instead of
+    # appending them, for when the gradebook has changed in ways the records don't describe
+    def snapshot(self):
+        self.take()
+        self.wait()
+        self.write_snapshot(storage.encode_snapshot(self.gb, self.save_path))
+
+    # Writes the snapshot, then restarts the journal from the records made meanwhile.
+    # Callers that serialize all writes on one thread can skip prepare_compaction and
+    # pass storage.encode_snapshot() output directly, after writing the earlier records.
+    def write_snapshot(self, data: bytes):
+        try:
+            storage.write_atomic(self.save_path, data, self.durable)
+            self.base = hashlib.sha1(data).hexdigest()
+            with self.lock:
+                tail, self.since_snapshot = self.since_snapshot or [], None
+                if tail:
+                    self._rewrite(self.base, tail)
+                else:
+                    discard(self.save_path)
+                    self.size = 0
+        except BaseException:
+            with self.lock:
+                self.since_snapshot = None
+            raise
+
+    # Thread target for background compaction: keeps the error for raise_error()
+    def _write_snapshot_logged(self, data: bytes):
+        try:
+            self.write_snapshot(data)
+        except BaseException as e:
+            self.error = e
+
+    # Atomically replaces the journal with a header for the current snapshot (base is its
+    # SHA-1, when known) plus the given records
+    def _rewrite(self, base: Optional[str], lines: List[str]):
+        header = json.dumps({"base": base, "file": file_identity(self.save_path)}) + "\n"
+        storage.write_atomic(self.path, (header + "".join(lines)).encode("utf-8"), self.durable)
+        self.size = len(header) + sum(len(line) for line in lines)
+
+    # Blocks until any background compaction has finished
+    def wait(self):
+        if self.worker is not None:
+            self.worker.join()
+            self.worker = None
+
+    # Re-raises an error from the last compaction, once
+    def raise_error(self):
+        if self.error is not None:
+            e, self.error = self.error, None
+            raise e
+
+    # Flushes, waits for compaction and unsubscribes from the gradebook
+    def close(self):
+        try:
+            self.flush()
+            self.wait()
+        finally:
+            if self.record in self.gb.listeners:
+                self.gb.listeners.remove(self.record)
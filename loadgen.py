@@ -0,0 +1,109 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import List, Optional
+from urllib.parse import quote
+
+
+# One keep-alive HTTP/1.1 client connection
+class Connection:
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    # Sends a request and returns (status, body), reconnecting if needed
+    async def request(self, method: str, path: str, body: bytes = b""):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        self.writer.write(f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                          f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body)
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            key, _, value = line.decode("latin-1").partition(":")
+            if key.strip().lower() == "content-length":
+                length = int(value)
+        return status, await self.reader.readexactly(length)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+# Picks the next request: mostly stats reads, with a share of mutations
+def next_request(semesters: List[str], write_ratio: float):
+    name = quote(random.choice(semesters))
+    if random.random() < write_ratio:
+        title = f"Load test {random.randrange(1000)}"
+        op = random.choice([{"op": "add_subject", "args": {"title": title}},
+                            {"op": "remove_subject", "args": {"title": title}}])
+        return "POST", f"/semesters/{name}/mutations", json.dumps(op).encode("utf-8")
+    return "GET", f"/semesters/{name}/subjects?pass_mark={random.choice([50, 65, 85])}", b""
+
+
+# Drives the server from `concurrency` connections until `duration` seconds have passed
+async def run(host: str, port: int, concurrency: int, duration: float, write_ratio: float):
+    probe = Connection(host, port)
+    status, body = await probe.request("GET", "/semesters")
+    probe.close()
+    semesters = [s["name"] for s in json.loads(body)]
+    if not semesters:
+        raise SystemExit("The server has no semesters to query.")
+
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        conn = Connection(host, port)
+        try:
+            while time.perf_counter() < deadline:
+                method, path, payload = next_request(semesters, write_ratio)
+                start = time.perf_counter()
+                status, _ = await conn.request(method, path, payload)
+                latencies.append(time.perf_counter() - start)
+                if status >= 500:
+                    errors += 1
+        finally:
+            conn.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    n = len(latencies)
+
+    def pct(p):
+        return latencies[min(n - 1, int(p / 100.0 * n))] * 1000.0 if n else float("nan")
+
+    print(f"requests   {n} in {elapsed:.2f}s ({n / elapsed:.0f} req/s), {errors} server errors")
+    print(f"latency    p50 {pct(50):.2f} ms   p90 {pct(90):.2f} ms   p99 {pct(99):.2f} ms   max {pct(100):.2f} ms")
+
+
+# Load generator for server.py: reports throughput and p50/p99 latency
+def main():
+    parser = argparse.ArgumentParser(description="Generate load against a running gradebook server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--concurrency", "-c", type=int, default=32, help="parallel connections (default: 32)")
+    parser.add_argument("--duration", "-d", type=float, default=10.0, help="seconds to run (default: 10)")
+    parser.add_argument("--write-ratio", type=float, default=0.05, help="share of requests that mutate (default: 0.05)")
+    parser.add_argument("--seed", type=int, help="random seed for a repeatable request mix")
+    args = parser.parse_args()
+    if args.seed is not None:
+        random.seed(args.seed)
+    asyncio.run(run(args.host, args.port, args.concurrency, args.duration, args.write_ratio))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,58 @@
-from ui import App, create_root
+import multiprocessing
+import sys
+import time
+
+_T0 = time.perf_counter()
+
+import profiling
 
              
 # Main entry point to setup and run the application
 def main():
+    # Worker processes of a frozen build re-run this entry point
+    multiprocessing.freeze_support()
+    if sys.argv[1:2] == ["batch"]:
+        from batch import main as batch_main
+        sys.exit(batch_main(sys.argv[2:]))
+    if sys.argv[1:2] == ["simulate"]:
+        from simulation import main as simulate_main
+        sys.exit(simulate_main(sys.argv[2:]))
+    if sys.argv[1:2] == ["overview"]:
+        from aggregate import main as overview_main
+        sys.exit(overview_main(sys.argv[2:]))
+    if sys.argv[1:2] == ["db"]:
+        from sqlstore import main as db_main
+        sys.exit(db_main(sys.argv[2:]))
+    if sys.argv[1:2] == ["serve"]:
+        from server import main as serve_main
+        sys.exit(serve_main(sys.argv[2:]))
+    if sys.argv[1:2] == ["import"]:
+        from csvimport import main as import_main
+        sys.exit(import_main(sys.argv[2:]))
+    if sys.argv[1:2] == ["diff"]:
+        from merge import diff_main
+        sys.exit(diff_main(sys.argv[2:]))
+    if sys.argv[1:2] == ["merge"]:
+        from merge import merge_main
+        sys.exit(merge_main(sys.argv[2:]))
+
+    profile = "--profile-startup" in sys.argv[1:]
+    if profile:
+        profiling.enable(_T0)
+
+    from ui import App, create_root
+    profiling.mark("import ui")
+
     root = create_root()
+    profiling.mark("create window")
     app = App(root)
     root.geometry("1280x720")
     root.minsize(1024, 675)
+
+    if profile:
+        root.update()
+        profiling.mark("first paint")
+        profiling.report()
     root.mainloop()
 
 if __name__ == "__main__":
@@ -0,0 +1,102 @@
+import json
+import os
+import time
+from typing import Dict, List, Optional, Any
+
+import storage
+
+MANIFEST_NAME = ".manifest.json"
+MANIFEST_VERSION = 1
+
+
+# Persistent index of the saves directory (name, mtime, size, subject count, last opened).
+# refresh() revalidates it with a single os.scandir pass, so listing files and finding the
+# most recent one never needs a stat per file on top of the directory read.
+class Manifest:
+    # Loads the stored manifest for saves_path, if there is one
+    def __init__(self, saves_path: str):
+        self.saves_path = saves_path
+        self.path = os.path.join(saves_path, MANIFEST_NAME)
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.dirty = False
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION:
+                self.entries = data.get("files", {})
+        except (OSError, ValueError, AttributeError):
+            self.entries = {}
+
+    # Reconciles the entries with the directory in one scandir pass and persists any change
+    def refresh(self):
+        seen = set()
+        try:
+            with os.scandir(self.saves_path) as it:
+                for de in it:
+                    if de.name.startswith(".") or not de.name.lower().endswith(storage.SAVE_EXTENSIONS):
+                        continue
+                    try:
+                        st = de.stat()
+                    except OSError:
+                        continue
+                    seen.add(de.name)
+                    entry = self.entries.get(de.name)
+                    if entry is None:
+                        self.entries[de.name] = {"name": storage.display_name(de.name), "mtime": st.st_mtime,
+                                                 "size": st.st_size, "subjects": None, "last_opened": None}
+                        self.dirty = True
+                    elif entry["mtime"] != st.st_mtime or entry["size"] != st.st_size:
+                        entry.update(mtime=st.st_mtime, size=st.st_size, subjects=None)
+                        self.dirty = True
+        except OSError:
+            pass
+        for name in [n for n in self.entries if n not in seen]:
+            del self.entries[name]
+            self.dirty = True
+        self.save()
+
+    # Writes the manifest back if anything changed
+    def save(self):
+        if not self.dirty:
+            return
+        try:
+            data = json.dumps({"version": MANIFEST_VERSION, "files": self.entries}, ensure_ascii=False)
+            # a lost manifest is just rebuilt, so it skips the fsync
+            storage.write_atomic(self.path, data.encode("utf-8"), durable=False)
+            self.dirty = False
+        except OSError:
+            pass
+
+    # Full paths of every known save file
+    def files(self) -> List[str]:
+        return [os.path.join(self.saves_path, n) for n in self.entries]
+
+    # Display names sorted case-insensitively, for the file combo
+    def names(self) -> List[str]:
+        return sorted((e["name"] for e in self.entries.values()), key=str.lower)
+
+    # Most recently modified save file, optionally skipping one path
+    def most_recent(self, exclude: Optional[str] = None) -> Optional[str]:
+        skip = os.path.basename(exclude) if exclude else None
+        best = None
+        for name, entry in self.entries.items():
+            if name != skip and (best is None or entry["mtime"] > self.entries[best]["mtime"]):
+                best = name
+        return os.path.join(self.saves_path, best) if best else None
+
+    # Records fresh facts about a file the app just loaded or wrote
+    def touch(self, path: str, subjects: Optional[int] = None, opened: bool = False):
+        if os.path.dirname(os.path.abspath(path)) != os.path.abspath(self.saves_path):
+            return
+        name = os.path.basename(path)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return
+        entry = self.entries.setdefault(name, {"name": storage.display_name(name), "subjects": None, "last_opened": None})
+        entry.update(mtime=st.st_mtime, size=st.st_size)
+        if subjects is not None:
+            entry["subjects"] = subjects
+        if opened:
+            entry["last_opened"] = time.time()
+        self.dirty = True
@@ -0,0 +1,224 @@
+import argparse
+import os
+import sys
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Tuple
+
+from models import Assessment, GradeBook, Subject
+from journal import load_readonly
+from aggregate import content_digest
+from tracing import traced
+import storage
+
+# (name, kind, weight, mark) with None for no mark, so rows compare and hash by value
+Row = Tuple[str, str, float, Optional[float]]
+
+
+# A subject's assessments as comparable rows, read straight from the columns
+def rows(subj: Optional[Subject]) -> List[Row]:
+    if subj is None:
+        return []
+    a = subj.assessments
+    return [(name, kind, weight, None if mark != mark else mark)
+            for name, kind, weight, mark in zip(a.names, a.kinds, a.weights, a.marks)]
+
+
+# Subject-level differences from a to b: (title, status) in title order, status being
+# "added", "removed" or "changed". Subjects whose digests match are skipped without a look at their rows.
+def diff_gradebooks(a: GradeBook, b: GradeBook) -> List[Tuple[str, str]]:
+    changes = []
+    for title in sorted(set(a.subjects) | set(b.subjects), key=lambda t: (t.lower(), t)):
+        sa, sb = a.subjects.get(title), b.subjects.get(title)
+        if sa is None:
+            changes.append((title, "added"))
+        elif sb is None:
+            changes.append((title, "removed"))
+        elif sa.digest() != sb.digest():
+            changes.append((title, "changed"))
+    return changes
+
+
+# Counts (added, removed, modified) rows between two assessment lists
+def diff_rows(a: List[Row], b: List[Row]) -> Tuple[int, int, int]:
+    added = removed = modified = 0
+    for op, i1, i2, j1, j2 in SequenceMatcher(None, a, b, autojunk=False).get_opcodes():
+        if op == "insert":
+            added += j2 - j1
+        elif op == "delete":
+            removed += i2 - i1
+        elif op == "replace":
+            common = min(i2 - i1, j2 - j1)
+            modified += common
+            removed += i2 - i1 - common
+            added += j2 - j1 - common
+    return added, removed, modified
+
+
+# Maps each base index that survives unchanged in other to its index there
+def _matches(base: List[Row], other: List[Row]) -> Dict[int, int]:
+    out = {}
+    for i, j, n in SequenceMatcher(None, base, other, autojunk=False).get_matching_blocks():
+        for k in range(n):
+            out[i + k] = j + k
+    return out
+
+
+# Three-way merge of assessment rows (diff3): rows kept by both sides anchor the merge and
+# each stretch in between takes whichever side changed it. A stretch changed differently on
+# both sides is a conflict, resolved in favour of `prefer`. Returns (rows, conflicts) where
+# each conflict is the (start, end) base row range it covers.
+def merge_rows(base: List[Row], ours: List[Row], theirs: List[Row],
+               prefer: str = "ours") -> Tuple[List[Row], List[Tuple[int, int]]]:
+    mo, mt = _matches(base, ours), _matches(base, theirs)
+    merged: List[Row] = []
+    conflicts = []
+    i = o = t = 0
+    for b in range(len(base) + 1):
+        if b < len(base):
+            if b not in mo or b not in mt:
+                continue
+            jo, jt = mo[b], mt[b]
+        else:
+            jo, jt = len(ours), len(theirs)
+        chunk_b, chunk_o, chunk_t = base[i:b], ours[o:jo], theirs[t:jt]
+        if chunk_o == chunk_t or chunk_t == chunk_b:
+            merged.extend(chunk_o)
+        elif chunk_o == chunk_b:
+            merged.extend(chunk_t)
+        else:
+            conflicts.append((i, b))
+            merged.extend(chunk_o if prefer == "ours" else chunk_t)
+        if b < len(base):
+            merged.append(base[b])
+        i, o, t = b + 1, jo + 1, jt + 1
+    return merged, conflicts
+
+
+# Builds a subject from merged rows
+def _subject(title: str, merged: List[Row]) -> Subject:
+    return Subject(title=title, assessments=[Assessment(*row) for row in merged])
+
+
+# Copies a subject column by column, for a gradebook of its own
+def _copy(subj: Subject) -> Subject:
+    copy = Subject(title=subj.title)
+    a = subj.assessments
+    copy.extend_columns(a.names, a.kinds, a.weights, a.marks)
+    return copy
+
+
+# Three-way merge of two gradebooks that both started from base. Subjects changed on one
+# side only are copied whole from that side (decided by digest, without comparing rows);
+# subjects changed on both sides get a row-level merge_rows. Returns (merged, conflicts),
+# with one message per conflict.
+@traced
+def merge_gradebooks(base: GradeBook, ours: GradeBook, theirs: GradeBook,
+                     prefer: str = "ours") -> Tuple[GradeBook, List[str]]:
+    merged = GradeBook()
+    conflicts = []
+    titles = set(base.subjects) | set(ours.subjects) | set(theirs.subjects)
+    for title in sorted(titles, key=lambda t: (t.lower(), t)):
+        sb, so, st = base.subjects.get(title), ours.subjects.get(title), theirs.subjects.get(title)
+        db, do, dt = (s.digest() if s is not None else None for s in (sb, so, st))
+        if do == dt or dt == db:
+            result = so
+        elif do == db:
+            result = st
+        elif so is None or st is None:
+            kept = st if so is None else so
+            deleted_by = "ours" if so is None else "theirs"
+            conflicts.append(f"{title}: removed in {deleted_by} but changed in the other; kept the changes")
+            result = kept
+        else:
+            rows_merged, spans = merge_rows(rows(sb), rows(so), rows(st), prefer)
+            for start, end in spans:
+                where = f"rows {start + 1}-{end}" if end > start else f"after row {start}"
+                conflicts.append(f"{title}: both sides changed {where}; kept {prefer}")
+            result = _subject(title, rows_merged)
+        if result is not None:
+            if result is so or result is st:
+                result = _copy(result)
+            merged.put_subject(result)
+    return merged, conflicts
+
+
+# Prints the differences between two gradebooks, indented; returns True if any
+def _print_diff(a: GradeBook, b: GradeBook, indent: str = "", out=sys.stdout) -> bool:
+    changes = diff_gradebooks(a, b)
+    for title, status in changes:
+        if status == "added":
+            out.write(f"{indent}+ {title} ({len(b.subjects[title].assessments)} assessments)\n")
+        elif status == "removed":
+            out.write(f"{indent}- {title} ({len(a.subjects[title].assessments)} assessments)\n")
+        else:
+            added, removed, modified = diff_rows(rows(a.subjects[title]), rows(b.subjects[title]))
+            out.write(f"{indent}~ {title} (+{added} -{removed} ~{modified})\n")
+    return bool(changes)
+
+
+# Save files in a directory by name
+def _save_files(directory: str) -> Dict[str, str]:
+    return {os.path.basename(p): p for p in storage.list_save_files(directory)}
+
+
+# Entry point for `python main.py diff <a> <b>`: compares two save files, or every save file
+# of two directories (files with identical bytes are skipped without parsing, the rest compared by root hash)
+def diff_main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(prog="main.py diff",
+                                     description="Show which subjects differ between two semesters or saves directories.")
+    parser.add_argument("a", help="save file or saves directory")
+    parser.add_argument("b", help="save file or saves directory")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.a) or not os.path.isdir(args.b):
+        if os.path.isdir(args.a) or os.path.isdir(args.b):
+            parser.error("compare two files or two directories")
+        return 1 if _print_diff(load_readonly(args.a), load_readonly(args.b)) else 0
+
+    files_a, files_b = _save_files(args.a), _save_files(args.b)
+    different = False
+    same = 0
+    for name in sorted(set(files_a) | set(files_b), key=str.lower):
+        if name not in files_b:
+            print(f"- {name}")
+        elif name not in files_a:
+            print(f"+ {name}")
+        elif content_digest(files_a[name]) == content_digest(files_b[name]):
+            same += 1
+            continue
+        else:
+            gb_a, gb_b = load_readonly(files_a[name]), load_readonly(files_b[name])
+            if gb_a.digest() == gb_b.digest():
+                same += 1
+                continue
+            print(f"~ {name}")
+            _print_diff(gb_a, gb_b, indent="    ")
+        different = True
+    print(f"{same} file(s) identical", file=sys.stderr)
+    return 1 if different else 0
+
+
+# Entry point for `python main.py merge <base> <ours> <theirs> -o <out>`
+def merge_main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(prog="main.py merge",
+                                     description="Three-way merge of two copies of a semester that share a common base.")
+    parser.add_argument("base", help="common ancestor save file")
+    parser.add_argument("ours", help="our copy")
+    parser.add_argument("theirs", help="their copy")
+    parser.add_argument("--output", "-o", required=True, help="merged save file (format from its extension)")
+    parser.add_argument("--prefer", choices=["ours", "theirs"], default="ours",
+                        help="side kept where both changed the same rows (default: ours)")
+    args = parser.parse_args(argv)
+
+    try:
+        base, ours, theirs = load_readonly(args.base), load_readonly(args.ours), load_readonly(args.theirs)
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    merged, conflicts = merge_gradebooks(base, ours, theirs, args.prefer)
+    storage.save_path(merged, args.output)
+    for message in conflicts:
+        print(f"CONFLICT {message}", file=sys.stderr)
+    print(f"Merged {len(merged.subjects)} subject(s) into {args.output}; {len(conflicts)} conflict(s).",
+          file=sys.stderr)
+    return 1 if conflicts else 0
@@ -1,6 +1,14 @@
+import hashlib
 import json
+import math
+import os
+import sys
+from array import array
+from bisect import bisect_left, insort
+from collections.abc import MutableSequence
 from dataclasses import dataclass, asdict, field
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+from tracing import traced
 
               
 # Represents a single assessment item with a weight and optional mark
@@ -11,31 +19,248 @@ class Assessment:
     weight: float
     mark: Optional[float] = None
 
-# Represents a subject containing a list of assessments
+
+# Column-store list of assessments: weights and marks live in float64 arrays
+# (NaN = no mark) and names/kinds are interned, so millions of items cost ~32 bytes
+# each instead of a dataclass instance apiece. Indexing returns a fresh Assessment
+# snapshot; assign it back (or use Subject.replace) to change a stored item.
+class AssessmentList(MutableSequence):
+    __slots__ = ("names", "kinds", "weights", "marks")
+
+    def __init__(self, items: Iterable[Assessment] = ()):
+        self.names: List[str] = []
+        self.kinds: List[str] = []
+        self.weights = array("d")
+        self.marks = array("d")
+        for a in items:
+            self.append(a)
+
+    def __len__(self) -> int:
+        return len(self.weights)
+
+    def _index(self, i: int) -> int:
+        n = len(self.weights)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("assessment index out of range")
+        return i
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        i = self._index(i)
+        mark = self.marks[i]
+        return Assessment(self.names[i], self.kinds[i], self.weights[i], None if mark != mark else mark)
+
+    def __setitem__(self, i: int, a: Assessment):
+        i = self._index(i)
+        self.names[i] = sys.intern(a.name)
+        self.kinds[i] = sys.intern(a.kind)
+        self.weights[i] = a.weight
+        self.marks[i] = math.nan if a.mark is None else a.mark
+
+    def __delitem__(self, i: int):
+        i = self._index(i)
+        del self.names[i]
+        del self.kinds[i]
+        del self.weights[i]
+        del self.marks[i]
+
+    def insert(self, i: int, a: Assessment):
+        self.names.insert(i, sys.intern(a.name))
+        self.kinds.insert(i, sys.intern(a.kind))
+        self.weights.insert(i, a.weight)
+        self.marks.insert(i, math.nan if a.mark is None else a.mark)
+
+    def append(self, a: Assessment):
+        self.names.append(sys.intern(a.name))
+        self.kinds.append(sys.intern(a.kind))
+        self.weights.append(a.weight)
+        self.marks.append(math.nan if a.mark is None else a.mark)
+
+    # Appends whole columns at once (marks use NaN for no mark), for bulk imports
+    def extend_columns(self, names: List[str], kinds: List[str], weights: Iterable[float], marks: Iterable[float]):
+        intern = sys.intern
+        self.names.extend([intern(n) for n in names])
+        self.kinds.extend([intern(k) for k in kinds])
+        self.weights.extend(weights)
+        self.marks.extend(marks)
+
+    def __iter__(self) -> Iterator[Assessment]:
+        for name, kind, weight, mark in zip(self.names, self.kinds, self.weights, self.marks):
+            yield Assessment(name, kind, weight, None if mark != mark else mark)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, AssessmentList):
+            return (self.names == other.names and self.kinds == other.kinds
+                    and self.weights == other.weights
+                    and [m if m == m else None for m in self.marks] == [m if m == m else None for m in other.marks])
+        if isinstance(other, (list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"AssessmentList({list(self)!r})"
+
+    # SHA-1 of the columns: the count, then the same bytes a binary save stores for them
+    def digest(self) -> str:
+        weights = array("d", self.weights)
+        marks = array("d", self.marks)
+        if sys.byteorder == "big":
+            weights.byteswap()
+            marks.byteswap()
+        h = hashlib.sha1(len(weights).to_bytes(8, "little"))
+        h.update(weights.tobytes())
+        h.update(marks.tobytes())
+        h.update(json.dumps([self.names, self.kinds], ensure_ascii=False).encode("utf-8"))
+        return h.hexdigest()
+
+    # Returns (completed_weight, planned_weight, contributed) straight from the columns
+    def totals(self) -> Tuple[float, float, float]:
+        completed_weight = 0.0
+        contributed = 0.0
+        for weight, mark in zip(self.weights, self.marks):
+            if mark == mark:
+                completed_weight += weight
+                contributed += weight * (mark / 100.0)
+        return completed_weight, float(sum(self.weights)), contributed
+
+# Represents a subject containing a column-stored list of assessments.
+# Running totals and the content digest are kept in step by append/pop/replace, so mutate
+# through those (or call recompute_totals() after touching the list directly).
 @dataclass
 class Subject:
     title: str
-    assessments: List[Assessment] = field(default_factory=list)
+    assessments: AssessmentList = field(default_factory=AssessmentList)
+    completed_weight: float = field(default=0.0, init=False, repr=False, compare=False)
+    planned_weight: float = field(default=0.0, init=False, repr=False, compare=False)
+    contributed: float = field(default=0.0, init=False, repr=False, compare=False)
+    _digest: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        if not isinstance(self.assessments, AssessmentList):
+            self.assessments = AssessmentList(self.assessments)
+        self.recompute_totals()
+
+    # Rebuilds the running totals from the assessment columns
+    def recompute_totals(self):
+        self._digest = None
+        self.completed_weight, self.planned_weight, self.contributed = self.assessments.totals()
+
+    # Adds (sign=1) or removes (sign=-1) one assessment from the running totals
+    def _account(self, a: Assessment, sign: float):
+        self._digest = None
+        self.planned_weight += sign * a.weight
+        if a.mark is not None:
+            self.completed_weight += sign * a.weight
+            self.contributed += sign * a.weight * (a.mark / 100.0)
+
+    # Appends an assessment, updating the totals in O(1)
+    def append(self, a: Assessment):
+        self.assessments.append(a)
+        self._account(a, 1.0)
+
+    # Appends many assessments given as columns (see AssessmentList.extend_columns)
+    def extend_columns(self, names: List[str], kinds: List[str], weights: List[float], marks: List[float]):
+        self.assessments.extend_columns(names, kinds, weights, marks)
+        self._digest = None
+        self.planned_weight += sum(weights)
+        for weight, mark in zip(weights, marks):
+            if mark == mark:
+                self.completed_weight += weight
+                self.contributed += weight * (mark / 100.0)
+
+    # Removes and returns the assessment at index, updating the totals in O(1)
+    def pop(self, index: int) -> Assessment:
+        a = self.assessments.pop(index)
+        self._account(a, -1.0)
+        if not self.assessments:
+            self.recompute_totals()
+        return a
+
+    # Replaces the assessment at index, updating the totals in O(1)
+    def replace(self, index: int, a: Assessment):
+        old = self.assessments[index]
+        self.assessments[index] = a
+        self._account(old, -1.0)
+        self._account(a, 1.0)
+
+    # Content hash of the assessments (not the title), cached until the next mutation,
+    # so equal subjects in two gradebooks compare in O(1) once hashed
+    def digest(self) -> str:
+        if self._digest is None:
+            self._digest = self.assessments.digest()
+        return self._digest
 
               
 # Manages the collection of subjects and their data
 class GradeBook:
+    # When True, stats() cross-checks the running totals against a full compute_stats
+    verify_stats = os.environ.get("GRADECALC_VERIFY_STATS") == "1"
+
     # Initializes an empty gradebook
     def __init__(self):
         self.subjects: Dict[str, Subject] = {}
+        # (title.lower(), title) for every subject, kept sorted for the subject list
+        self.order: List[Tuple[str, str]] = []
+        # Callables invoked as listener(op, args) after every successful mutation
+        self.listeners: List[Callable[[str, Dict[str, Any]], None]] = []
+
+                 
+    # Adds an already-built subject (e.g. while loading) without notifying listeners
+    def put_subject(self, subj: Subject):
+        key = (subj.title.lower(), subj.title)
+        if subj.title in self.subjects:
+            del self.order[self.title_position(subj.title)]
+        self.subjects[subj.title] = subj
+        insort(self.order, key)
+
+                 
+    # Replaces all subjects at once and rebuilds the sorted index
+    def set_subjects(self, subjects: Dict[str, Subject]):
+        self.subjects = subjects
+        self.order = sorted((t.lower(), t) for t in subjects)
+
+                 
+    # Removes every subject without notifying listeners
+    def clear(self):
+        self.set_subjects({})
+
+                 
+    # Titles sorted case-insensitively, as the subject list shows them
+    def sorted_titles(self) -> List[str]:
+        return [t for _, t in self.order]
+
+                 
+    # Position of a title in sorted_titles(), found by bisection
+    def title_position(self, title: str) -> int:
+        i = bisect_left(self.order, (title.lower(), title))
+        if i == len(self.order) or self.order[i][1] != title:
+            raise ValueError("Subject not found.")
+        return i
+
+                 
+    # Tells every listener about a mutation that just happened
+    def _notify(self, op: str, **args):
+        for listener in self.listeners:
+            listener(op, args)
 
                  
     # Adds a new subject by title
     def add_subject(self, title: str):
         if title in self.subjects:
             raise ValueError("Subject already exists.")
-        self.subjects[title] = Subject(title=title)
+        self.put_subject(Subject(title=title))
+        self._notify("add_subject", title=title)
 
                     
     # Removes a subject by title
     def remove_subject(self, title: str):
         if title in self.subjects:
             del self.subjects[title]
+            del self.order[self.title_position(title)]
+            self._notify("remove_subject", title=title)
 
                     
     # Renames an existing subject
@@ -44,24 +269,85 @@ class GradeBook:
             raise ValueError("Subject not found.")
         if new in self.subjects and new != old:
             raise ValueError("Another subject with that name already exists.")
+        if not isinstance(new, str):
+            raise TypeError("Subject title must be a string.")
+        del self.order[self.title_position(old)]
         subj = self.subjects.pop(old)
         subj.title = new
-        self.subjects[new] = subj
+        self.put_subject(subj)
+        self._notify("rename_subject", old=old, new=new)
 
                     
     # Adds an assessment to a specific subject
     def add_assessment(self, subj: str, a: Assessment):
         if subj not in self.subjects:
             raise ValueError("Subject not found.")
-        self.subjects[subj].assessments.append(a)
+        self.subjects[subj].append(a)
+        self._notify("add_assessment", subject=subj, assessment=asdict(a))
 
                        
     # Removes an assessment from a subject by index
     def delete_assessment(self, subj: str, index: int):
-        self.subjects[subj].assessments.pop(index)
+        self.subjects[subj].pop(index)
+        self._notify("delete_assessment", subject=subj, index=index)
+
+                       
+    # Replaces the assessment at index in a subject
+    def replace_assessment(self, subj: str, index: int, a: Assessment):
+        if subj not in self.subjects:
+            raise ValueError("Subject not found.")
+        self.subjects[subj].replace(index, a)
+        self._notify("replace_assessment", subject=subj, index=index, assessment=asdict(a))
+
+                       
+    # Re-applies a mutation record produced by _notify (used for journal replay)
+    def apply(self, op: str, args: Dict[str, Any]):
+        if op == "add_subject":
+            self.add_subject(args["title"])
+        elif op == "remove_subject":
+            self.remove_subject(args["title"])
+        elif op == "rename_subject":
+            self.rename_subject(args["old"], args["new"])
+        elif op == "add_assessment":
+            self.add_assessment(args["subject"], assessment_from_dict(args["assessment"]))
+        elif op == "delete_assessment":
+            self.delete_assessment(args["subject"], args["index"])
+        elif op == "replace_assessment":
+            self.replace_assessment(args["subject"], args["index"], assessment_from_dict(args["assessment"]))
+        else:
+            raise ValueError(f"Unknown gradebook operation '{op}'.")
+
+                       
+    # Returns compute_stats-style statistics for a subject from its running totals
+    @traced
+    def stats(self, subj: str, pass_mark: float = 50.0) -> Dict[str, Any]:
+        from calculations import compute_stats, stats_from_totals
+        s = self.subjects[subj]
+        result = stats_from_totals(s.completed_weight, s.planned_weight, s.contributed, pass_mark)
+        if self.verify_stats:
+            expected = compute_stats(s.assessments, pass_mark)
+            for key, value in expected.items():
+                got = result[key]
+                if value is None or got is None or math.isinf(value):
+                    ok = got == value
+                else:
+                    ok = abs(got - value) <= 1e-6
+                if not ok:
+                    raise AssertionError(f"Running stats for '{subj}' drifted: {key}={got!r}, expected {value!r}")
+        return result
 
                
+    # Root hash over every (title, subject digest) pair in title order; equal roots mean
+    # equal content whatever the save format
+    def digest(self) -> str:
+        h = hashlib.sha1()
+        for title in sorted(self.subjects):
+            h.update(title.encode("utf-8") + b"\0" + self.subjects[title].digest().encode("ascii") + b"\n")
+        return h.hexdigest()
+
+                       
     # Serializes the gradebook data to a JSON string
+    @traced
     def as_json(self) -> str:
         raw = {k: {"title": v.title, "assessments": [asdict(a) for a in v.assessments]}
                for k, v in self.subjects.items()}
@@ -69,16 +355,158 @@ class GradeBook:
 
                  
     # Loads gradebook data from a JSON string
+    @traced
     def load_json(self, s: str):
         data = json.loads(s)
-        self.subjects.clear()
+        self.clear()
         for k, v in data.items():
-            subj = Subject(title=v["title"])
-            for a in v.get("assessments", []):
-                subj.assessments.append(Assessment(
-                    name=a["name"],
-                    kind=a.get("kind", "Assessment"),
-                    weight=float(a["weight"]),
-                    mark=(None if a.get("mark") is None else float(a["mark"])),
-                ))
-            self.subjects[subj.title] = subj
+            self.put_subject(subject_from_dict(v))
+
+                 
+    # Loads gradebook data subject by subject from a text file object.
+    # on_subject is called after each subject is added; on error the previous subjects are restored.
+    @traced
+    def load_stream(self, fp: TextIO, on_subject: Optional[Callable[[Subject], None]] = None):
+        previous = self.subjects
+        self.clear()
+        try:
+            for subj in iter_json_subjects(fp):
+                self.put_subject(subj)
+                if on_subject:
+                    on_subject(subj)
+        except Exception:
+            self.set_subjects(previous)
+            raise
+
+
+# Upper bound accepted for an assessment weight, in percent
+MAX_WEIGHT = 1000.0
+
+
+# Parses a weight in percent, e.g. "25" or " 12.5 "
+def parse_weight(text: str) -> float:
+    try:
+        weight = float(text.strip())
+    except ValueError:
+        raise ValueError("Weight must be a number.")
+    return check_weight(weight)
+
+
+# Returns weight if it is within 0..MAX_WEIGHT percent, else raises ValueError
+def check_weight(weight: float) -> float:
+    if not (0.0 <= weight <= MAX_WEIGHT):
+        raise ValueError(f"Weight must be between 0 and {MAX_WEIGHT:g}%.")
+    return weight
+
+
+# Returns mark if it is None or within 0..100 percent, else raises ValueError
+def check_mark(mark: Optional[float]) -> Optional[float]:
+    if mark is not None and not (0.0 <= mark <= 100.0):
+        raise ValueError("Mark must be between 0 and 100 after conversion.")
+    return mark
+
+
+# Parses a mark in percent: blank for no mark, a number such as "75" or a fraction such as "14/20"
+def parse_mark(text: str) -> Optional[float]:
+    text = text.strip()
+    if text == "":
+        return None
+    if "/" in text:
+        num, denom = text.split("/")
+        num = float(num.strip())
+        denom = float(denom.strip())
+        if denom <= 0:
+            raise ValueError("Denominator must be > 0")
+        mark = (num / denom) * 100.0
+    else:
+        mark = float(text)
+    return check_mark(mark)
+
+
+# Builds an Assessment from its decoded JSON object
+def assessment_from_dict(a: Dict[str, Any]) -> Assessment:
+    return Assessment(
+        name=a["name"],
+        kind=a.get("kind", "Assessment"),
+        weight=float(a["weight"]),
+        mark=(None if a.get("mark") is None else float(a["mark"])),
+    )
+
+
+# Builds a Subject from its decoded JSON object
+def subject_from_dict(v: Dict[str, Any]) -> Subject:
+    subj = Subject(title=v["title"])
+    for a in v.get("assessments", []):
+        subj.append(assessment_from_dict(a))
+    return subj
+
+
+# Yields subjects one at a time from a gradebook JSON file object.
+# Only the subject currently being decoded (plus one read chunk) is held in memory.
+def iter_json_subjects(fp: TextIO, chunk_size: int = 1 << 16) -> Iterator[Subject]:
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    eof = False
+
+    # Drops consumed text and reads at least another chunk; returns False at end of file
+    def fill() -> bool:
+        nonlocal buf, pos, eof
+        if eof:
+            return False
+        data = fp.read(max(chunk_size, len(buf) - pos))
+        if not data:
+            eof = True
+            return False
+        buf = buf[pos:] + data
+        pos = 0
+        return True
+
+    # Skips whitespace and returns the next character ("" at end of file)
+    def peek() -> str:
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n":
+                pos += 1
+            if pos < len(buf):
+                return buf[pos]
+            if not fill():
+                return ""
+
+    # Decodes one complete JSON value, reading more input until it fits
+    def value():
+        nonlocal pos
+        peek()
+        while True:
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if fill():
+                    continue
+                raise
+            pos = end
+            return obj
+
+    # Consumes an expected separator character
+    def expect(ch: str):
+        nonlocal pos
+        if peek() != ch:
+            raise ValueError(f"Malformed gradebook JSON: expected '{ch}' at offset {pos}.")
+        pos += 1
+
+    first = peek()
+    if first == "":
+        return
+    expect("{")
+    if peek() == "}":
+        return
+    while True:
+        key = value()
+        if not isinstance(key, str):
+            raise ValueError("Malformed gradebook JSON: subject keys must be strings.")
+        expect(":")
+        yield subject_from_dict(value())
+        sep = peek()
+        if sep == "}":
+            return
+        expect(",")
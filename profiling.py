@@ -0,0 +1,32 @@
+import sys
+import time
+from typing import List, Tuple
+
+# Startup phase timer behind main.py --profile-startup; mark() is a no-op until enable()
+_enabled = False
+_start = time.perf_counter()
+_marks: List[Tuple[str, float]] = []
+
+
+# Starts recording, measuring from the given perf_counter() origin
+def enable(start: float):
+    global _enabled, _start
+    _enabled = True
+    _start = start
+    _marks.clear()
+
+
+# Records that the named phase has just finished
+def mark(phase: str):
+    if _enabled:
+        _marks.append((phase, time.perf_counter()))
+
+
+# Prints the per-phase breakdown recorded so far
+def report(out=None):
+    out = out or sys.stderr
+    prev = _start
+    print("Startup profile (ms):", file=out)
+    for phase, t in _marks:
+        print(f"  {phase:<28}{(t - prev) * 1000.0:9.1f}{(t - _start) * 1000.0:10.1f}", file=out)
+        prev = t
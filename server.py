@@ -0,0 +1,332 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from models import GradeBook, check_mark, check_weight
+from journal import Journal
+from manifest import Manifest
+from tracing import span
+import storage
+
+DEFAULT_PORT = 8765
+DEFAULT_CACHE_SIZE = 32
+MAX_BODY = 1 << 20
+
+
+# Error that becomes an HTTP error response
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+# A loaded semester kept in memory, with the journal that persists its mutations
+class HotGradeBook:
+    def __init__(self, path: str, gb: GradeBook):
+        self.path = path
+        self.gb = gb
+        self.journal = Journal(path, gb)
+        # Journal writes run on worker threads; holding this keeps them in mutation order.
+        # Created on the event loop by GradeServer._load.
+        self.write_lock: Optional[asyncio.Lock] = None
+
+    # Writes a full snapshot and stops journaling (called on eviction and shutdown)
+    def close(self):
+        try:
+            if os.path.exists(self.journal.path):
+                self.journal.compact()
+        finally:
+            self.journal.close()
+
+
+# Serves GradeBook queries and mutations over a small HTTP/JSON API:
+#   GET  /semesters                              list semester files
+#   GET  /semesters/{name}/subjects              subjects with stats (?pass_mark=50)
+#   GET  /semesters/{name}/subjects/{title}      one subject's assessments and stats
+#   POST /semesters/{name}/mutations             {"op": ..., "args": {...}} as in GradeBook.apply
+# Recently used gradebooks stay loaded, least recently used first out.
+class GradeServer:
+    def __init__(self, saves_path: str, cache_size: int = DEFAULT_CACHE_SIZE):
+        if cache_size < 1:
+            raise ValueError("cache_size must be at least 1.")
+        self.saves_path = saves_path
+        self.manifest = Manifest(saves_path)
+        self.cache_size = cache_size
+        self.hot: "OrderedDict[str, HotGradeBook]" = OrderedDict()
+        self.loading: Dict[str, asyncio.Future] = {}
+        self.closing: Dict[str, asyncio.Future] = {}
+        self.requests = 0
+
+    # Maps a semester name to its save file, refusing anything outside saves_path
+    def path_for(self, name: str) -> str:
+        if not name or name.startswith(".") or "/" in name or "\\" in name:
+            raise HTTPError(400, "Invalid semester name.")
+        for ext in storage.SAVE_EXTENSIONS:
+            path = os.path.join(self.saves_path, name + ext)
+            if os.path.exists(path):
+                return path
+        raise HTTPError(404, f"Semester '{name}' not found.")
+
+    # Returns the cached semester, loading it off the event loop on a miss. The result is
+    # still cached when this returns, so callers may mutate it before their next await.
+    async def gradebook(self, name: str) -> HotGradeBook:
+        while True:
+            hot = self.hot.get(name)
+            if hot is not None:
+                self.hot.move_to_end(name)
+                return hot
+            pending = self.loading.get(name)
+            if pending is None:
+                pending = asyncio.ensure_future(self._load(name, self.path_for(name)))
+                self.loading[name] = pending
+            await asyncio.shield(pending)
+
+    # Loads a semester on a worker thread, after any pending close of the same file
+    async def _load(self, name: str, path: str):
+        try:
+            closing = self.closing.get(name)
+            if closing is not None:
+                await asyncio.shield(closing)
+            hot = await asyncio.get_running_loop().run_in_executor(None, _open_hot, path)
+            hot.write_lock = asyncio.Lock()
+            self.hot[name] = hot
+            self._evict()
+        finally:
+            del self.loading[name]
+
+    # Drops least recently used gradebooks beyond the cache size; their snapshots are
+    # written in the background and a reload of the same file waits for that write
+    def _evict(self):
+        loop = asyncio.get_running_loop()
+        while len(self.hot) > self.cache_size:
+            name, hot = self.hot.popitem(last=False)
+            closing = asyncio.ensure_future(self._close_hot(hot))
+            self.closing[name] = closing
+            closing.add_done_callback(lambda f, name=name: self._closed(name, f))
+
+    # Closes a gradebook on a worker thread once its queued journal writes are done
+    async def _close_hot(self, hot: HotGradeBook):
+        async with hot.write_lock:
+            await asyncio.get_running_loop().run_in_executor(None, hot.close)
+
+    # Forgets a finished background close
+    def _closed(self, name: str, future: asyncio.Future):
+        if self.closing.get(name) is future:
+            del self.closing[name]
+
+    # Flushes every cached gradebook to disk
+    async def close(self):
+        while self.hot:
+            _name, hot = self.hot.popitem(last=False)
+            await self._close_hot(hot)
+        if self.closing:
+            await asyncio.gather(*self.closing.values(), return_exceptions=True)
+
+    # Routes one request and returns (status, JSON-able body)
+    async def dispatch(self, method: str, target: str, body: bytes) -> Tuple[int, Any]:
+        url = urlsplit(target)
+        parts = [unquote(p) for p in url.path.split("/") if p]
+        query = parse_qs(url.query)
+        try:
+            pass_mark = float(query.get("pass_mark", ["50"])[0])
+        except ValueError:
+            raise HTTPError(400, "pass_mark must be a number.")
+
+        if parts == ["semesters"] and method == "GET":
+            self.manifest.refresh()
+            return 200, [{"name": e["name"], "subjects": e["subjects"], "size": e["size"], "mtime": e["mtime"]}
+                         for e in self.manifest.entries.values()]
+        if len(parts) >= 3 and parts[0] == "semesters":
+            name = parts[1]
+            if parts[2:] == ["subjects"] and method == "GET":
+                gb = (await self.gradebook(name)).gb
+                return 200, [{"title": t, "stats": _json_stats(gb.stats(t, pass_mark))} for t in gb.sorted_titles()]
+            if len(parts) == 4 and parts[2] == "subjects" and method == "GET":
+                gb = (await self.gradebook(name)).gb
+                subj = gb.subjects.get(parts[3])
+                if subj is None:
+                    raise HTTPError(404, f"Subject '{parts[3]}' not found.")
+                return 200, {"title": subj.title,
+                             "assessments": [vars(a) for a in subj.assessments],
+                             "stats": _json_stats(gb.stats(subj.title, pass_mark))}
+            if parts[2:] == ["mutations"] and method == "POST":
+                hot = await self.gradebook(name)
+                try:
+                    req = json.loads(body or b"{}")
+                    if not isinstance(req, dict):
+                        raise ValueError("the body must be a JSON object")
+                    args = req.get("args", {})
+                    _check_mutation(req["op"], args)
+                    hot.gb.apply(req["op"], args)
+                except (ValueError, KeyError, IndexError, TypeError) as e:
+                    raise HTTPError(400, f"Mutation rejected: {e}")
+                # durable before replying; concurrent mutations share one fsync (group commit).
+                # A coroutine can't be @traced, so the wait the client sees gets a span of its own.
+                lines = hot.journal.take()
+                with span("server.mutation_commit"):
+                    async with hot.write_lock:
+                        await asyncio.get_running_loop().run_in_executor(None, hot.journal.write, lines)
+                return 200, {"ok": True, "subjects": len(hot.gb.subjects)}
+        raise HTTPError(404 if method in ("GET", "POST") else 405, "No such endpoint.")
+
+    # Serves one keep-alive connection
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                try:
+                    length = int(headers.get("content-length", "0") or 0)
+                    if length < 0:
+                        raise ValueError(length)
+                except ValueError:
+                    length = None
+                if length is not None and length > MAX_BODY:
+                    break
+
+                self.requests += 1
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                if length is None:
+                    # the body can't be delimited, so answer and drop the connection
+                    status, payload = 400, {"error": "Invalid Content-Length header."}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    try:
+                        status, payload = await self.dispatch(method.upper(), target, body)
+                    except HTTPError as e:
+                        status, payload = e.status, {"error": str(e)}
+                    except Exception as e:
+                        status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 {status} {_REASONS.get(status, 'OK')}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+# Checks a mutation request's argument types and value bounds before anything is applied,
+# raising HTTPError 400 so a bad request never leaves a gradebook half-changed
+def _check_mutation(op: Any, args: Any):
+    def fail(message: str):
+        raise HTTPError(400, f"Mutation rejected: {message}")
+
+    if op not in _MUTATION_ARGS:
+        fail(f"unknown operation {op!r}")
+    if not isinstance(args, dict):
+        fail("args must be a JSON object")
+    for key in _MUTATION_ARGS[op]:
+        value = args.get(key)
+        if key == "index":
+            if not isinstance(value, int) or isinstance(value, bool):
+                fail("index must be an integer")
+        elif key == "assessment":
+            if not isinstance(value, dict):
+                fail("assessment must be a JSON object")
+            if not isinstance(value.get("name"), str) or not isinstance(value.get("kind", "Assessment"), str):
+                fail("assessment name and kind must be strings")
+            weight, mark = value.get("weight"), value.get("mark")
+            if not _is_number(weight) or (mark is not None and not _is_number(mark)):
+                fail("assessment weight and mark must be numbers")
+            try:
+                check_weight(float(weight))
+                check_mark(None if mark is None else float(mark))
+            except ValueError as e:
+                fail(str(e))
+        elif not isinstance(value, str):
+            fail(f"{key} must be a string")
+
+
+# True for JSON numbers (bool is an int subclass but not a number here)
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+# Argument names of each GradeBook.apply operation
+_MUTATION_ARGS = {
+    "add_subject": ("title",),
+    "remove_subject": ("title",),
+    "rename_subject": ("old", "new"),
+    "add_assessment": ("subject", "assessment"),
+    "delete_assessment": ("subject", "index"),
+    "replace_assessment": ("subject", "index", "assessment"),
+}
+
+
+# Loads a semester and replays its journal (runs on a worker thread)
+def _open_hot(path: str) -> HotGradeBook:
+    gb = GradeBook()
+    storage.load_path(gb, path)
+    hot = HotGradeBook(path, gb)
+    hot.journal.replay()
+    return hot
+
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+# Makes a stats dict JSON-safe (an impossible target becomes null plus a flag)
+def _json_stats(stats: Dict[str, Any]) -> Dict[str, Any]:
+    out = dict(stats)
+    out["impossible"] = stats["needed_avg_remaining"] == math.inf
+    if out["impossible"]:
+        out["needed_avg_remaining"] = None
+    return out
+
+
+# Runs the server until interrupted, then flushes cached gradebooks
+async def serve(saves_path: str, host: str, port: int, cache_size: int):
+    app = GradeServer(saves_path, cache_size)
+    server = await asyncio.start_server(app.handle, host, port)
+    print(f"Serving {saves_path} on http://{host}:{port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await app.close()
+
+
+# Entry point for `python main.py serve <dir>`
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(prog="main.py serve", description="Serve gradebooks over a local HTTP/JSON API.")
+    parser.add_argument("directory", help="saves directory to serve")
+    parser.add_argument("--host", default="127.0.0.1", help="address to bind (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"port (default: {DEFAULT_PORT})")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE,
+                        help=f"gradebooks kept in memory (default: {DEFAULT_CACHE_SIZE})")
+    args = parser.parse_args(argv)
+    if not os.path.isdir(args.directory):
+        parser.error(f"not a directory: {args.directory}")
+    if args.cache_size < 1:
+        parser.error("--cache-size must be at least 1")
+    try:
+        asyncio.run(serve(args.directory, args.host, args.port, args.cache_size))
+    except KeyboardInterrupt:
+        pass
+    return 0
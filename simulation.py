@@ -0,0 +1,196 @@
+import argparse
+import csv
+import importlib.util
+import json
+import math
+import os
+import sys
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from models import Assessment, GradeBook
+from journal import load_readonly
+
+# numpy is slow to import and only the simulations need it, so only check it exists here;
+# the functions that use it import it when called
+HAVE_NUMPY = importlib.util.find_spec("numpy") is not None
+
+DEFAULT_SAMPLES = 1_000_000
+# Samples drawn per vectorized step, to bound memory for subjects with many pending items
+CHUNK_SAMPLES = 200_000
+# Mark model used when a subject has no completed marks at all: (mean, standard deviation)
+PRIOR = (65.0, 15.0)
+# Completed marks of other kinds count this much towards a kind's mean (shrinkage)
+PRIOR_WEIGHT = 2.0
+MIN_SD = 5.0
+# z for a two-sided 95% interval
+Z95 = 1.959963984540054
+
+FIELDS = ["file", "subject", "pass_probability", "ci_low", "ci_high", "mean_final",
+          "pending_weight", "samples", "error"]
+
+
+# Fits a (mean, sd) mark model per assessment kind from the completed marks.
+# Each kind's mean is shrunk towards the subject-wide mean so one or two marks don't
+# dominate; every kind shares the subject-wide spread. Unseen kinds get the subject model.
+def fit_mark_models(assessments: Sequence[Assessment]) -> Dict[Optional[str], Tuple[float, float]]:
+    done = [a for a in assessments if a.mark is not None]
+    if not done:
+        return {None: PRIOR}
+    marks = [a.mark for a in done]
+    mean = sum(marks) / len(marks)
+    if len(marks) > 1:
+        sd = math.sqrt(sum((m - mean) ** 2 for m in marks) / (len(marks) - 1))
+    else:
+        sd = PRIOR[1]
+    sd = max(sd, MIN_SD)
+    models = {None: (mean, sd)}
+    by_kind: Dict[str, List[float]] = {}
+    for a in done:
+        by_kind.setdefault(a.kind, []).append(a.mark)
+    for kind, ks in by_kind.items():
+        models[kind] = ((sum(ks) + PRIOR_WEIGHT * mean) / (len(ks) + PRIOR_WEIGHT), sd)
+    return models
+
+
+# Wilson score interval for a binomial proportion
+def wilson_interval(successes: int, n: int, z: float = Z95) -> Tuple[float, float]:
+    if n == 0:
+        return 0.0, 1.0
+    p = successes / n
+    denom = 1.0 + z * z / n
+    centre = (p + z * z / (2 * n)) / denom
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return max(0.0, centre - half), min(1.0, centre + half)
+
+
+# Estimates the probability of finishing at or above pass_mark by sampling the pending marks
+# from the fitted models (normal, clipped to 0-100). Pass seed for a repeatable result.
+def pass_probability(assessments: Sequence[Assessment], pass_mark: float = 50.0,
+                     samples: int = DEFAULT_SAMPLES, seed=None,
+                     models: Optional[Dict[Optional[str], Tuple[float, float]]] = None) -> Dict[str, Any]:
+    if not HAVE_NUMPY:
+        raise RuntimeError("Pass-probability simulation requires numpy (pip install numpy).")
+    import numpy as np
+    if models is None:
+        models = fit_mark_models(assessments)
+    contributed = sum(a.weight * (a.mark / 100.0) for a in assessments if a.mark is not None)
+    pending = [a for a in assessments if a.mark is None]
+    fallback = models.get(None, PRIOR)
+    weights = np.array([a.weight / 100.0 for a in pending], dtype=np.float64)
+    means = np.array([models.get(a.kind, fallback)[0] for a in pending], dtype=np.float64)
+    sds = np.array([models.get(a.kind, fallback)[1] for a in pending], dtype=np.float64)
+
+    if not pending:
+        passed = samples if contributed >= pass_mark - 1e-9 else 0
+        total = contributed * samples
+    else:
+        rng = np.random.default_rng(seed)
+        passed = 0
+        total = 0.0
+        left = samples
+        while left > 0:
+            n = min(left, CHUNK_SAMPLES)
+            draws = rng.standard_normal((n, len(pending)))
+            draws *= sds
+            draws += means
+            np.clip(draws, 0.0, 100.0, out=draws)
+            final = draws @ weights
+            final += contributed
+            passed += int(np.count_nonzero(final >= pass_mark - 1e-9))
+            total += float(final.sum())
+            left -= n
+
+    low, high = wilson_interval(passed, samples)
+    return {
+        "pass_probability": passed / samples if samples else 0.0,
+        "ci_low": low,
+        "ci_high": high,
+        "mean_final": total / samples if samples else contributed,
+        "pending_weight": float(weights.sum() * 100.0),
+        "samples": samples,
+    }
+
+
+# Seed for one subject, derived from the run seed and the subject's identity so the result
+# does not depend on how work is split across processes
+def subject_seed(seed: Optional[int], path: str, title: str):
+    if seed is None:
+        return None
+    import numpy as np
+    return np.random.SeedSequence([seed, zlib.crc32(path.encode("utf-8")), zlib.crc32(title.encode("utf-8"))])
+
+
+# Worker: simulates one subject given as plain (path, title, assessments) data
+def _simulate_subject(task) -> Dict[str, Any]:
+    path, title, rows, pass_mark, samples, seed = task
+    try:
+        assessments = [Assessment(*row) for row in rows]
+        result = pass_probability(assessments, pass_mark, samples, subject_seed(seed, path, title))
+        return {**dict.fromkeys(FIELDS), "file": path, "subject": title, **result}
+    except Exception as e:
+        return {**dict.fromkeys(FIELDS), "file": path, "subject": title, "error": f"{type(e).__name__}: {e}"}
+
+
+# Simulates every subject of the given gradebooks across a process pool.
+# gradebooks maps a label (usually the file path) to a GradeBook; results come back in order.
+def simulate_gradebooks(gradebooks: Dict[str, GradeBook], pass_mark: float = 50.0,
+                        samples: int = DEFAULT_SAMPLES, seed: Optional[int] = None, workers: int = 0):
+    tasks = []
+    for path, gb in gradebooks.items():
+        for title in gb.sorted_titles():
+            rows = [(a.name, a.kind, a.weight, a.mark) for a in gb.subjects[title].assessments]
+            tasks.append((path, title, rows, pass_mark, samples, seed))
+    if workers == 1 or len(tasks) <= 1:
+        yield from map(_simulate_subject, tasks)
+        return
+    with ProcessPoolExecutor(max_workers=workers or None) as pool:
+        yield from pool.map(_simulate_subject, tasks)
+
+
+# Entry point for `python main.py simulate <file or dir>...`
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(prog="main.py simulate",
+                                     description="Estimate each subject's chance of passing by Monte Carlo simulation.")
+    parser.add_argument("paths", nargs="+", help="save files or saves directories")
+    parser.add_argument("--pass-mark", type=float, default=50.0, help="pass mark in percent (default: 50)")
+    parser.add_argument("--samples", type=int, default=DEFAULT_SAMPLES,
+                        help=f"samples per subject (default: {DEFAULT_SAMPLES})")
+    parser.add_argument("--seed", type=int, help="seed for a repeatable result")
+    parser.add_argument("--format", choices=["csv", "jsonl"], default="csv", help="output format (default: csv)")
+    parser.add_argument("--workers", type=int, default=0, help="worker processes (default: one per CPU)")
+    args = parser.parse_args(argv)
+    if not HAVE_NUMPY:
+        parser.error("simulation requires numpy (pip install numpy)")
+    if args.samples <= 0:
+        parser.error("--samples must be positive")
+
+    from batch import find_save_files
+    gradebooks = {}
+    failures = 0
+    out = sys.stdout
+    writer = None
+    if args.format == "csv":
+        writer = csv.DictWriter(out, fieldnames=FIELDS, lineterminator="\n")
+        writer.writeheader()
+
+    def emit(row):
+        if writer:
+            writer.writerow(row)
+        else:
+            out.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    for p in args.paths:
+        for path in (find_save_files(p) if os.path.isdir(p) else [p]):
+            try:
+                gradebooks[path] = load_readonly(path)
+            except Exception as e:
+                failures += 1
+                emit({**dict.fromkeys(FIELDS), "file": path, "error": f"{type(e).__name__}: {e}"})
+    for row in simulate_gradebooks(gradebooks, args.pass_mark, args.samples, args.seed, args.workers):
+        if row["error"]:
+            failures += 1
+        emit(row)
+    out.flush()
+    return 1 if failures else 0
@@ -0,0 +1,346 @@
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from models import Assessment, AssessmentList, GradeBook, Subject, assessment_from_dict
+from journal import load_readonly
+import storage
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS semesters (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS subjects (
+    id INTEGER PRIMARY KEY,
+    semester_id INTEGER NOT NULL REFERENCES semesters(id) ON DELETE CASCADE,
+    title TEXT NOT NULL,
+    completed_weight REAL NOT NULL DEFAULT 0,
+    planned_weight REAL NOT NULL DEFAULT 0,
+    contributed REAL NOT NULL DEFAULT 0,
+    UNIQUE (semester_id, title)
+);
+CREATE INDEX IF NOT EXISTS subjects_title ON subjects(title COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS assessments (
+    id INTEGER PRIMARY KEY,
+    subject_id INTEGER NOT NULL REFERENCES subjects(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    weight REAL NOT NULL,
+    mark REAL
+);
+CREATE INDEX IF NOT EXISTS assessments_subject ON assessments(subject_id, position);
+CREATE INDEX IF NOT EXISTS assessments_kind ON assessments(kind);
+"""
+
+# Recomputes a subject's stored totals from its assessment rows
+UPDATE_TOTALS = """
+UPDATE subjects SET
+    completed_weight = (SELECT COALESCE(SUM(weight), 0) FROM assessments WHERE subject_id = :id AND mark IS NOT NULL),
+    planned_weight = (SELECT COALESCE(SUM(weight), 0) FROM assessments WHERE subject_id = :id),
+    contributed = (SELECT COALESCE(SUM(weight * mark / 100.0), 0) FROM assessments WHERE subject_id = :id AND mark IS NOT NULL)
+WHERE id = :id
+"""
+
+
+# Many semesters in one SQLite database: normalized subject and assessment tables, with each
+# subject's running totals stored alongside so cross-semester queries never read assessments.
+# The database runs in WAL mode so readers (e.g. headless tools) don't block the writer.
+class SQLiteStore:
+    # Opens (creating if needed) the database at path
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version > SCHEMA_VERSION:
+            self.conn.close()
+            raise ValueError(f"Unsupported gradebook database version {version}.")
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+            self.conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    # Closes the connection
+    def close(self):
+        self.conn.close()
+
+    # Names of every stored semester, sorted case-insensitively
+    def semesters(self) -> List[str]:
+        rows = self.conn.execute("SELECT name FROM semesters ORDER BY name COLLATE NOCASE")
+        return [r["name"] for r in rows]
+
+    # Returns the id of a semester, creating it if create is True
+    def semester_id(self, name: str, create: bool = False) -> Optional[int]:
+        row = self.conn.execute("SELECT id FROM semesters WHERE name = ?", (name,)).fetchone()
+        if row is not None:
+            return row["id"]
+        if not create:
+            return None
+        cur = self.conn.execute("INSERT INTO semesters (name, updated_at) VALUES (?, ?)", (name, time.time()))
+        return cur.lastrowid
+
+    # Returns the id of a subject in a semester, or None
+    def subject_id(self, semester_id: int, title: str) -> Optional[int]:
+        row = self.conn.execute("SELECT id FROM subjects WHERE semester_id = ? AND title = ?",
+                                (semester_id, title)).fetchone()
+        return None if row is None else row["id"]
+
+    # Loads one subject without touching the rest of its semester
+    def load_subject(self, name: str, title: str) -> Optional[Subject]:
+        sid = self.semester_id(name)
+        subject_id = None if sid is None else self.subject_id(sid, title)
+        if subject_id is None:
+            return None
+        rows = self.conn.execute("SELECT name, kind, weight, mark FROM assessments WHERE subject_id = ? ORDER BY position",
+                                 (subject_id,))
+        return Subject(title=title, assessments=AssessmentList([Assessment(*r) for r in rows]))
+
+    # Loads a whole semester into gb (replacing its contents)
+    def load(self, gb: GradeBook, name: str):
+        sid = self.semester_id(name)
+        if sid is None:
+            raise ValueError(f"Semester '{name}' not found.")
+        subjects: Dict[int, Subject] = {}
+        for r in self.conn.execute("SELECT id, title FROM subjects WHERE semester_id = ?", (sid,)):
+            subjects[r["id"]] = Subject(title=r["title"])
+        rows = self.conn.execute(
+            "SELECT a.subject_id, a.name, a.kind, a.weight, a.mark FROM assessments a "
+            "JOIN subjects s ON s.id = a.subject_id WHERE s.semester_id = ? ORDER BY a.subject_id, a.position", (sid,))
+        for subject_id, *fields in rows:
+            subjects[subject_id].assessments.append(Assessment(*fields))
+        gb.set_subjects({})
+        for subj in subjects.values():
+            subj.recompute_totals()
+            gb.put_subject(subj)
+
+    # Replaces a semester with the contents of gb in one transaction
+    def save(self, gb: GradeBook, name: str):
+        with self.conn:
+            self._write_semester(gb, name)
+
+    # Writes a semester's rows; the caller owns the transaction
+    def _write_semester(self, gb: GradeBook, name: str):
+        sid = self.semester_id(name, create=True)
+        self.conn.execute("DELETE FROM subjects WHERE semester_id = ?", (sid,))
+        self.conn.execute("UPDATE semesters SET updated_at = ? WHERE id = ?", (time.time(), sid))
+        for subj in gb.subjects.values():
+            cur = self.conn.execute(
+                "INSERT INTO subjects (semester_id, title, completed_weight, planned_weight, contributed) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (sid, subj.title, subj.completed_weight, subj.planned_weight, subj.contributed))
+            subject_id = cur.lastrowid
+            a = subj.assessments
+            if isinstance(a, AssessmentList):
+                rows = ((subject_id, i, n, k, w, None if m != m else m)
+                        for i, (n, k, w, m) in enumerate(zip(a.names, a.kinds, a.weights, a.marks)))
+            else:
+                rows = ((subject_id, i, x.name, x.kind, x.weight, x.mark) for i, x in enumerate(a))
+            self.conn.executemany(
+                "INSERT INTO assessments (subject_id, position, name, kind, weight, mark) VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    # Removes a semester and everything in it
+    def delete(self, name: str):
+        with self.conn:
+            self.conn.execute("DELETE FROM semesters WHERE name = ?", (name,))
+
+    # Imports save files (JSON or binary, plus pending journals) in a single transaction.
+    # Each file becomes the semester named after it. Returns the names imported.
+    def import_files(self, paths: List[str]) -> List[str]:
+        from batch import find_save_files
+        names = []
+        with self.conn:
+            for p in paths:
+                for path in (find_save_files(p) if os.path.isdir(p) else [p]):
+                    name = storage.display_name(path)
+                    self._write_semester(load_readonly(path), name)
+                    names.append(name)
+        return names
+
+    # Writes a semester to a save file, in the format its extension selects
+    def export_file(self, name: str, path: str):
+        gb = GradeBook()
+        self.load(gb, name)
+        storage.save_path(gb, path)
+
+    # Subject totals across semesters, filtered by title (case-insensitive) and/or assessment kind
+    def subject_rows(self, title: Optional[str] = None, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        sql = ("SELECT se.name AS semester, s.title, s.completed_weight, s.planned_weight, s.contributed "
+               "FROM subjects s JOIN semesters se ON se.id = s.semester_id")
+        where, params = [], []
+        if title is not None:
+            where.append("s.title = ? COLLATE NOCASE")
+            params.append(title)
+        if kind is not None:
+            where.append("EXISTS (SELECT 1 FROM assessments a WHERE a.subject_id = s.id AND a.kind = ?)")
+            params.append(kind)
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY se.name COLLATE NOCASE, s.title COLLATE NOCASE"
+        return [dict(r) for r in self.conn.execute(sql, params)]
+
+    # Count, total weight and weighted average mark per assessment kind across every semester
+    def kind_summary(self) -> List[Dict[str, Any]]:
+        rows = self.conn.execute(
+            "SELECT kind, COUNT(*) AS assessments, COUNT(mark) AS marked, SUM(weight) AS weight, "
+            "SUM(CASE WHEN mark IS NOT NULL THEN weight * mark END) / NULLIF(SUM(CASE WHEN mark IS NOT NULL "
+            "THEN weight END), 0) AS average_mark FROM assessments GROUP BY kind ORDER BY kind")
+        return [dict(r) for r in rows]
+
+    # Keeps a semester in the database in step with an in-memory gradebook,
+    # first writing the gradebook as that semester if the database doesn't have it yet
+    def attach(self, gb: GradeBook, name: str) -> "SQLiteSync":
+        if self.semester_id(name) is None:
+            self.save(gb, name)
+        return SQLiteSync(self, gb, name)
+
+
+# GradeBook listener that mirrors mutations into a SQLiteStore semester. Records are buffered
+# and applied in one transaction per flush(), so a burst of edits costs a single commit.
+class SQLiteSync:
+    def __init__(self, store: SQLiteStore, gb: GradeBook, name: str):
+        self.store = store
+        self.gb = gb
+        self.name = name
+        self.pending: List[Tuple[str, Dict[str, Any]]] = []
+        gb.listeners.append(self.record)
+
+    # Listener hook: buffers one mutation until the next flush()
+    def record(self, op: str, args: Dict[str, Any]):
+        self.pending.append((op, args))
+
+    # Applies the buffered mutations in a single transaction
+    def flush(self):
+        if not self.pending:
+            return
+        ops, self.pending = self.pending, []
+        conn = self.store.conn
+        try:
+            with conn:
+                sid = self.store.semester_id(self.name, create=True)
+                touched = set()
+                for op, args in ops:
+                    touched.add(self._apply(sid, op, args))
+                touched.discard(None)
+                conn.executemany(UPDATE_TOTALS, ({"id": i} for i in touched))
+                conn.execute("UPDATE semesters SET updated_at = ? WHERE id = ?", (time.time(), sid))
+        except BaseException:
+            self.pending[:0] = ops
+            raise
+
+    # Applies one mutation record; returns the id of the subject whose totals changed
+    def _apply(self, sid: int, op: str, args: Dict[str, Any]) -> Optional[int]:
+        conn = self.store.conn
+        if op == "add_subject":
+            conn.execute("INSERT INTO subjects (semester_id, title) VALUES (?, ?)", (sid, args["title"]))
+            return None
+        if op == "remove_subject":
+            conn.execute("DELETE FROM subjects WHERE semester_id = ? AND title = ?", (sid, args["title"]))
+            return None
+        if op == "rename_subject":
+            conn.execute("UPDATE subjects SET title = ? WHERE semester_id = ? AND title = ?",
+                         (args["new"], sid, args["old"]))
+            return None
+        subject_id = self.store.subject_id(sid, args["subject"])
+        if subject_id is None:
+            raise ValueError(f"Subject '{args['subject']}' not found in the database.")
+        if op == "add_assessment":
+            a = assessment_from_dict(args["assessment"])
+            conn.execute(
+                "INSERT INTO assessments (subject_id, position, name, kind, weight, mark) "
+                "VALUES (?, (SELECT COUNT(*) FROM assessments WHERE subject_id = ?), ?, ?, ?, ?)",
+                (subject_id, subject_id, a.name, a.kind, a.weight, a.mark))
+        elif op == "delete_assessment":
+            position = self._position(subject_id, args["index"])
+            conn.execute("DELETE FROM assessments WHERE subject_id = ? AND position = ?", (subject_id, position))
+            conn.execute("UPDATE assessments SET position = position - 1 WHERE subject_id = ? AND position > ?",
+                         (subject_id, position))
+        elif op == "replace_assessment":
+            a = assessment_from_dict(args["assessment"])
+            conn.execute("UPDATE assessments SET name = ?, kind = ?, weight = ?, mark = ? "
+                         "WHERE subject_id = ? AND position = ?",
+                         (a.name, a.kind, a.weight, a.mark, subject_id, self._position(subject_id, args["index"])))
+        else:
+            raise ValueError(f"Unknown gradebook operation '{op}'.")
+        return subject_id
+
+    # Maps a list index from a mutation record (negative counts from the end) to a stored position
+    def _position(self, subject_id: int, index: int) -> int:
+        count = self.store.conn.execute("SELECT COUNT(*) FROM assessments WHERE subject_id = ?",
+                                        (subject_id,)).fetchone()[0]
+        if not -count <= index < count:
+            raise IndexError(f"Assessment index {index} out of range in the database.")
+        return index + count if index < 0 else index
+
+    # Flushes and unsubscribes from the gradebook
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            if self.record in self.gb.listeners:
+                self.gb.listeners.remove(self.record)
+
+
+# Writes rows to stdout as CSV or JSON Lines
+def _print_rows(rows: List[Dict[str, Any]], fmt: str):
+    if fmt == "jsonl":
+        for row in rows:
+            sys.stdout.write(json.dumps(row, ensure_ascii=False) + "\n")
+        return
+    if not rows:
+        return
+    writer = csv.DictWriter(sys.stdout, fieldnames=list(rows[0]), lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(rows)
+
+
+# Entry point for `python main.py db <command> ...`
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(prog="main.py db", description="Keep many semesters in one SQLite database.")
+    parser.add_argument("database", help="SQLite database file (created if missing)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    p = commands.add_parser("import", help="import save files or saves directories")
+    p.add_argument("paths", nargs="+")
+    p = commands.add_parser("export", help="write a semester to a save file (.json or .ugcb)")
+    p.add_argument("semester")
+    p.add_argument("output")
+    commands.add_parser("list", help="list semesters")
+    p = commands.add_parser("subjects", help="subject totals across semesters")
+    p.add_argument("--title", help="only subjects with this title (case-insensitive)")
+    p.add_argument("--kind", help="only subjects with an assessment of this kind")
+    p.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+    p = commands.add_parser("kinds", help="average mark per assessment kind")
+    p.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+    args = parser.parse_args(argv)
+
+    store = SQLiteStore(args.database)
+    try:
+        if args.command == "import":
+            names = store.import_files(args.paths)
+            print(f"Imported {len(names)} semester(s).", file=sys.stderr)
+        elif args.command == "export":
+            store.export_file(args.semester, args.output)
+        elif args.command == "list":
+            for name in store.semesters():
+                print(name)
+        elif args.command == "subjects":
+            _print_rows(store.subject_rows(args.title, args.kind), args.format)
+        elif args.command == "kinds":
+            _print_rows(store.kind_summary(), args.format)
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        store.close()
+    return 0
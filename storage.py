@@ -0,0 +1,481 @@
+import glob
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+from array import array
+from typing import Callable, Dict, List, Optional
+
+from models import GradeBook, Subject, AssessmentList
+from tracing import traced
+
+# Save files ending in BINARY_EXT use the binary format, everything else is JSON text
+JSON_EXT = ".json"
+BINARY_EXT = ".ugcb"
+SAVE_EXTENSIONS = (JSON_EXT, BINARY_EXT)
+# Whether writes wait for fsync by default; GRADECALC_FSYNC=0 trades crash safety for speed
+DURABLE = os.environ.get("GRADECALC_FSYNC", "1") != "0"
+
+# Binary layout (little-endian, version 1):
+#   header   magic, version, flags, subject count, index offset
+#   data     per subject: weights (float64 x n), marks (float64 x n, NaN = no mark),
+#            then a UTF-8 JSON [names, kinds] pair; each block starts 8-byte aligned
+#   index    per subject: title length + UTF-8 title, then INDEX_ENTRY
+MAGIC = b"UGCB"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIQ")
+TITLE_LEN = struct.Struct("<I")
+INDEX_ENTRY = struct.Struct("<IQIddd")
+
+
+# Read-only memory map over a binary save file
+class MappedFile:
+    # Opens the file and maps it read-only
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, "rb")
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self.file.close()
+            raise
+
+    # Returns (title, count, offset, strings_len, completed_weight, planned_weight, contributed) per subject
+    def read_index(self) -> List[tuple]:
+        magic, version, _flags, count, index_offset = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a binary gradebook file.")
+        if version > VERSION:
+            raise ValueError(f"Unsupported binary gradebook version {version}.")
+        entries = []
+        pos = index_offset
+        for _ in range(count):
+            (title_len,) = TITLE_LEN.unpack_from(self.map, pos)
+            pos += TITLE_LEN.size
+            title = self.map[pos:pos + title_len].decode("utf-8")
+            pos += title_len
+            entries.append((title,) + INDEX_ENTRY.unpack_from(self.map, pos))
+            pos += INDEX_ENTRY.size
+        return entries
+
+    # Maps the file again after close(), e.g. when a replacing write failed
+    def reopen(self):
+        self.__init__(self.path)
+
+    # Closes the mapping and the underlying file
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+
+# AssessmentList whose columns are read from a mapped file on first access,
+# so subjects that are never viewed never touch their pages
+class MappedAssessmentList(AssessmentList):
+    __slots__ = ("source", "offset", "count", "strings_len", "stored_totals")
+
+    def __init__(self, source: MappedFile, offset: int, count: int, strings_len: int, totals: tuple):
+        self.source = source
+        self.offset = offset
+        self.count = count
+        self.strings_len = strings_len
+        self.stored_totals = totals
+
+    # Reports whether the columns have been read from the file yet
+    @property
+    def loaded(self) -> bool:
+        try:
+            object.__getattribute__(self, "weights")
+            return True
+        except AttributeError:
+            return False
+
+    # Unset column slots land here: read them from the map, then retry the lookup
+    def __getattr__(self, name):
+        if name not in AssessmentList.__slots__:
+            raise AttributeError(name)
+        self.load()
+        return object.__getattribute__(self, name)
+
+    # Reads this subject's columns out of the mapped file
+    def load(self):
+        if self.loaded:
+            return
+        buf = self.source.map
+        n = self.count
+        pos = self.offset
+        weights = array("d")
+        weights.frombytes(buf[pos:pos + 8 * n])
+        marks = array("d")
+        marks.frombytes(buf[pos + 8 * n:pos + 16 * n])
+        if sys.byteorder == "big":
+            weights.byteswap()
+            marks.byteswap()
+        names, kinds = json.loads(buf[pos + 16 * n:pos + 16 * n + self.strings_len].decode("utf-8"))
+        self.weights = weights
+        self.marks = marks
+        self.names = [sys.intern(s) for s in names]
+        self.kinds = [sys.intern(s) for s in kinds]
+
+    # Returns this subject's raw data block without decoding it
+    def raw_block(self) -> bytes:
+        return self.source.map[self.offset:self.offset + 16 * self.count + self.strings_len]
+
+    # Hashes the raw block while unread, which matches AssessmentList.digest() of the decoded columns
+    def digest(self) -> str:
+        if self.loaded:
+            return super().digest()
+        h = hashlib.sha1(self.count.to_bytes(8, "little"))
+        h.update(self.raw_block())
+        return h.hexdigest()
+
+    def __len__(self) -> int:
+        return len(self.weights) if self.loaded else self.count
+
+    def totals(self):
+        return super().totals() if self.loaded else self.stored_totals
+
+
+# Checks the first bytes of a file for the binary magic
+def is_binary_file(path: str) -> bool:
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+# Encodes one subject's data block from its columns
+def _encode_block(assessments: AssessmentList) -> bytes:
+    weights = array("d", assessments.weights)
+    marks = array("d", assessments.marks)
+    if sys.byteorder == "big":
+        weights.byteswap()
+        marks.byteswap()
+    strings = json.dumps([assessments.names, assessments.kinds], ensure_ascii=False).encode("utf-8")
+    return weights.tobytes() + marks.tobytes() + strings
+
+
+# Serializes the whole gradebook to binary bytes; unread mapped subjects are copied raw.
+# Returns the bytes plus the new data offset of every subject, in order.
+def encode_binary(gb: GradeBook):
+    out = bytearray(HEADER.size)
+    out.extend(b"\0" * (-len(out) % 8))
+    index = bytearray()
+    offsets = []
+    for subj in gb.subjects.values():
+        a = subj.assessments
+        if isinstance(a, MappedAssessmentList) and not a.loaded:
+            block = a.raw_block()
+            count, strings_len = a.count, a.strings_len
+        else:
+            block = _encode_block(a)
+            count, strings_len = len(a), len(block) - 16 * len(a)
+        offsets.append(len(out))
+        title = subj.title.encode("utf-8")
+        index += TITLE_LEN.pack(len(title)) + title
+        index += INDEX_ENTRY.pack(count, len(out), strings_len,
+                                  subj.completed_weight, subj.planned_weight, subj.contributed)
+        out += block
+        out.extend(b"\0" * (-len(out) % 8))
+    index_offset = len(out)
+    out += index
+    HEADER.pack_into(out, 0, MAGIC, VERSION, 0, len(gb.subjects), index_offset)
+    return bytes(out), offsets
+
+
+# Replaces the gradebook contents with lazily mapped subjects from a binary file
+def load_binary(gb: GradeBook, path: str, on_subject: Optional[Callable[[Subject], None]] = None):
+    source = MappedFile(path)
+    try:
+        entries = source.read_index()
+    except Exception:
+        source.close()
+        raise
+    gb.clear()
+    for title, count, offset, strings_len, completed, planned, contributed in entries:
+        subj = Subject(title=title, assessments=MappedAssessmentList(
+            source, offset, count, strings_len, (completed, planned, contributed)))
+        gb.put_subject(subj)
+        if on_subject:
+            on_subject(subj)
+
+
+# Writes the gradebook in binary form, then remaps unread subjects onto the new file
+def save_binary(gb: GradeBook, path: str):
+    data, offsets = encode_binary(gb)
+    lazy = [(subj.assessments, off) for subj, off in zip(gb.subjects.values(), offsets)
+            if isinstance(subj.assessments, MappedAssessmentList) and not subj.assessments.loaded]
+    old_sources = {id(a.source): a.source for a, _ in lazy}
+    # Windows refuses to replace a file that is still mapped
+    for src in old_sources.values():
+        src.close()
+    try:
+        write_atomic(path, data)
+    except Exception:
+        for src in old_sources.values():
+            src.reopen()
+        raise
+    if lazy:
+        source = MappedFile(path)
+        for a, off in lazy:
+            a.source = source
+            a.offset = off
+
+
+# Loads a save file, detecting binary vs JSON from its contents
+@traced
+def load_path(gb: GradeBook, path: str, on_subject: Optional[Callable[[Subject], None]] = None):
+    if is_binary_file(path):
+        load_binary(gb, path, on_subject=on_subject)
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            gb.load_stream(f, on_subject=on_subject)
+
+
+# Saves to path, choosing the format from the file extension
+@traced
+def save_path(gb: GradeBook, path: str):
+    if path.lower().endswith(BINARY_EXT):
+        save_binary(gb, path)
+    else:
+        write_atomic(path, gb.as_json().encode("utf-8"))
+
+
+# Reads every still-unread mapped subject into memory and closes the mappings
+def materialize(gb: GradeBook):
+    sources = {}
+    for subj in gb.subjects.values():
+        a = subj.assessments
+        if isinstance(a, MappedAssessmentList):
+            if not a.loaded:
+                a.load()
+            sources[id(a.source)] = a.source
+    for src in sources.values():
+        src.close()
+
+
+# Serializes the gradebook to the bytes save_path would write for this path.
+# Binary snapshots materialize mapped subjects first so the result no longer depends on the map.
+@traced
+def encode_snapshot(gb: GradeBook, path: str) -> bytes:
+    if path.lower().endswith(BINARY_EXT):
+        materialize(gb)
+        return encode_binary(gb)[0]
+    return gb.as_json().encode("utf-8")
+
+
+# One write waiting in a GroupCommitter queue
+class _PendingWrite:
+    __slots__ = ("kind", "path", "data", "durable", "event", "lead", "finished", "error")
+
+    def __init__(self, kind: str, path: str, data: bytes, durable: bool):
+        self.kind = kind
+        self.path = path
+        self.data = data
+        self.durable = durable
+        self.event = threading.Event()
+        self.lead = False
+        self.finished = False
+        self.error: Optional[BaseException] = None
+
+
+# Group commit for file writes. Each caller blocks until its write is on disk; a caller that
+# finds no commit running leads one for everything queued so far, so writes that pile up
+# behind a slow fsync (from several open gradebooks, or bursts of edits) share one cycle:
+# a file replaced twice is written once, appends to one file get one fsync, and each
+# directory is fsynced once after its renames. Replacements go through a temp file that is
+# fsynced before os.replace, so a crash leaves either the old or the new content.
+class GroupCommitter:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queue: List[_PendingWrite] = []
+        self.leading = False
+        self.batches = 0
+        self.writes = 0
+
+    # Atomically replaces path with data
+    def replace(self, path: str, data: bytes, durable: Optional[bool] = None):
+        self._submit("replace", path, data, durable)
+
+    # Appends data to path, creating it if needed
+    def append(self, path: str, data: bytes, durable: Optional[bool] = None):
+        self._submit("append", path, data, durable)
+
+    # Queues a write and waits for the commit that includes it, leading one if none is running
+    def _submit(self, kind: str, path: str, data: bytes, durable: Optional[bool]):
+        w = _PendingWrite(kind, path, data, DURABLE if durable is None else durable)
+        with self.lock:
+            self.queue.append(w)
+            w.lead = not self.leading
+            self.leading = True
+        while not w.finished:
+            if w.lead:
+                self._lead()
+            else:
+                w.event.wait()
+                w.event.clear()
+        if w.error is not None:
+            raise w.error
+
+    # Commits the queued batch, then hands leadership to the oldest write queued meanwhile
+    def _lead(self):
+        with self.lock:
+            batch, self.queue = self.queue, []
+        try:
+            self._commit(batch)
+        except BaseException as e:
+            for w in batch:
+                if w.error is None:
+                    w.error = e
+            raise
+        finally:
+            for w in batch:
+                w.finished = True
+                w.event.set()
+            with self.lock:
+                if self.queue:
+                    nxt = self.queue[0]
+                    nxt.lead = True
+                    nxt.event.set()
+                else:
+                    self.leading = False
+
+    # Writes one batch in order; errors are kept on the writes they belong to
+    @traced("storage.group_commit")
+    def _commit(self, batch: List[_PendingWrite]):
+        self.batches += 1
+        self.writes += len(batch)
+        # a replace is superseded by a later replace of the same path with no append between;
+        # it isn't written and shares the outcome of the write that replaces it
+        superseded: Dict[int, int] = {}
+        later: Dict[str, int] = {}
+        for i in range(len(batch) - 1, -1, -1):
+            w = batch[i]
+            j = later.get(w.path)
+            if w.kind == "replace" and j is not None and batch[j].kind == "replace":
+                superseded[i] = j
+            later[w.path] = i
+
+        appends: Dict[str, tuple] = {}
+        dirs = set()
+
+        def sync_appends(path):
+            f, writes = appends.pop(path)
+            try:
+                f.flush()
+                if any(w.durable for w in writes):
+                    os.fsync(f.fileno())
+            except OSError as e:
+                for w in writes:
+                    w.error = e
+            finally:
+                f.close()
+
+        try:
+            for i, w in enumerate(batch):
+                if i in superseded:
+                    continue
+                try:
+                    if w.kind == "append":
+                        if w.path not in appends:
+                            if not os.path.exists(w.path):
+                                dirs.add(os.path.dirname(os.path.abspath(w.path)))
+                            appends[w.path] = (open(w.path, "ab"), [])
+                        f, writes = appends[w.path]
+                        f.write(w.data)
+                        writes.append(w)
+                    else:
+                        if w.path in appends:
+                            sync_appends(w.path)
+                        _replace_file(w.path, w.data, w.durable)
+                        if w.durable:
+                            dirs.add(os.path.dirname(os.path.abspath(w.path)))
+                except OSError as e:
+                    w.error = e
+        finally:
+            for path in list(appends):
+                sync_appends(path)
+        for i in sorted(superseded, reverse=True):
+            batch[i].error = batch[superseded[i]].error
+        for d in dirs:
+            _fsync_dir(d)
+
+
+# Process umask, read once (os.umask can only be read by setting it)
+_UMASK = os.umask(0o022)
+os.umask(_UMASK)
+
+
+# Writes data to a fresh temp file next to path (fsynced when durable) and renames it over path
+def _replace_file(path: str, data: bytes, durable: bool):
+    folder, name = os.path.split(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=folder, prefix="." + name + ".", suffix=".tmp")
+    try:
+        # mkstemp creates the file 0600; keep the target's mode, or the usual one for a new file
+        if hasattr(os, "fchmod"):
+            try:
+                mode = os.stat(path).st_mode & 0o7777
+            except FileNotFoundError:
+                mode = 0o666 & ~_UMASK
+            os.fchmod(fd, mode)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            if durable:
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+# Makes renames inside a directory durable (not possible, nor needed, on Windows)
+def _fsync_dir(path: str):
+    if os.name == "nt":
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass  # some filesystems refuse fsync on directories
+    finally:
+        os.close(fd)
+
+
+COMMITTER = GroupCommitter()
+
+
+# Atomically replaces path with data: the file holds either its old or its new content,
+# whatever happens mid-write. durable=None uses DURABLE (fsync unless GRADECALC_FSYNC=0).
+@traced
+def write_atomic(path: str, data: bytes, durable: Optional[bool] = None):
+    COMMITTER.replace(path, data, durable)
+
+
+# Appends data to path through the group committer
+@traced
+def append_durable(path: str, data: bytes, durable: Optional[bool] = None):
+    COMMITTER.append(path, data, durable)
+
+
+# Lists every save file in a directory
+def list_save_files(saves_path: str) -> List[str]:
+    files = []
+    for ext in SAVE_EXTENSIONS:
+        files.extend(glob.glob(os.path.join(saves_path, "*" + ext)))
+    return files
+
+
+# Returns the display name of a save file (its basename without extension)
+def display_name(path: str) -> str:
+    return os.path.splitext(os.path.basename(path))[0]
@@ -0,0 +1,133 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Tuple
+
+# Named spans around the hot paths, enabled with GRADECALC_TRACE=1 or from the UI's tracing
+# panel. While disabled, span() hands back a shared no-op and traced() functions make one
+# flag check before calling straight through.
+_enabled = os.environ.get("GRADECALC_TRACE") == "1"
+# Completed spans kept for export: (name, start ns, duration ns, thread id)
+MAX_EVENTS = 200_000
+_events: Deque[Tuple[str, int, int, int]] = deque(maxlen=MAX_EVENTS)
+# Most recent durations per span name (ns), for the rolling latency panel
+WINDOW = 200
+_recent: Dict[str, Deque[int]] = {}
+_origin = time.perf_counter_ns()
+
+
+# Reports whether spans are being recorded
+def is_enabled() -> bool:
+    return _enabled
+
+
+# Starts or stops recording
+def set_enabled(on: bool):
+    global _enabled
+    _enabled = on
+
+
+# Drops every recorded span
+def clear():
+    _events.clear()
+    _recent.clear()
+
+
+# Stores one finished span
+def record(name: str, start: int, duration: int):
+    _events.append((name, start, duration, threading.get_ident()))
+    window = _recent.get(name)
+    if window is None:
+        window = _recent.setdefault(name, deque(maxlen=WINDOW))
+    window.append(duration)
+
+
+# Context manager timing one span
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        record(self.name, self.start, end - self.start)
+        return False
+
+
+# Context manager that does nothing, returned while tracing is off
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+# `with span("name"):` times the block when tracing is on
+def span(name: str):
+    return _Span(name) if _enabled else _NULL_SPAN
+
+
+# Decorator that wraps every call of fn in a span (named after fn unless given)
+def traced(name_or_fn=None):
+    def wrap(fn: Callable, name: str):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(name, start, time.perf_counter_ns() - start)
+        return wrapper
+
+    if callable(name_or_fn):
+        return wrap(name_or_fn, name_or_fn.__qualname__)
+    return lambda fn: wrap(fn, name_or_fn or fn.__qualname__)
+
+
+# Rolling latency per span name over the last WINDOW calls, slowest p95 first:
+# (name, calls recorded, last ms, p50 ms, p95 ms, max ms)
+def summary() -> List[Tuple[str, int, float, float, float, float]]:
+    rows = []
+    for name, window in list(_recent.items()):
+        durations = sorted(window)
+        if not durations:
+            continue
+        n = len(durations)
+        ms = 1e-6
+        rows.append((name, n, window[-1] * ms, durations[n // 2] * ms,
+                     durations[min(n - 1, int(n * 0.95))] * ms, durations[-1] * ms))
+    rows.sort(key=lambda r: r[4], reverse=True)
+    return rows
+
+
+# Recorded spans as a Chrome trace-event document (open in chrome://tracing or Perfetto)
+def chrome_trace() -> Dict[str, Any]:
+    pid = os.getpid()
+    events = [{"name": name, "cat": name.split(".", 1)[0], "ph": "X", "pid": pid, "tid": tid,
+               "ts": (start - _origin) / 1000.0, "dur": duration / 1000.0}
+              for name, start, duration, tid in list(_events)]
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+# Writes the recorded spans to path as Chrome trace-event JSON; returns the number of spans
+def export_chrome(path: str) -> int:
+    doc = chrome_trace()
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(doc, f)
+    return len(doc["traceEvents"])
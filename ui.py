@@ -1,45 +1,74 @@
 import sys
 import math
+import importlib.util
+import threading
 import os
-import glob
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, simpledialog
 from typing import Optional, List
 
-USE_TTKB = False
-try:
-    import ttkbootstrap as tb
-    from ttkbootstrap.constants import *
-    USE_TTKB = True
-except Exception:
-    USE_TTKB = False
-
-HAVE_MPL = True
-try:
-    from matplotlib.figure import Figure
-    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-except Exception:
-    HAVE_MPL = False
-
-from models import GradeBook, Assessment
-from calculations import compute_stats
+# ttkbootstrap and matplotlib are slow to import, so only check they exist here;
+# ttkbootstrap is imported by create_root() and matplotlib once the first graph is drawn
+USE_TTKB = importlib.util.find_spec("ttkbootstrap") is not None
+tb = None
+PRIMARY, SECONDARY, SUCCESS, DANGER = "primary", "secondary", "success", "danger"
+
+HAVE_MPL = importlib.util.find_spec("matplotlib") is not None
+Figure = None
+FigureCanvasTkAgg = None
+
+from models import GradeBook, Assessment, parse_mark, parse_weight
+import storage
+from journal import Journal
+import journal
+from autosave import AutoSaver
+from manifest import Manifest
+import profiling
+import tracing
+from tracing import traced
 
 # Creates the main window, using ttkbootstrap if available
 def create_root():
+    global USE_TTKB, tb
+    if USE_TTKB:
+        try:
+            import ttkbootstrap as tb
+        except Exception:
+            USE_TTKB = False
+    profiling.mark("import ttkbootstrap")
     if USE_TTKB:
         root = tb.Window(themename="flatly")
     else:
         root = tk.Tk()
     return root
 
+
+# Imports the matplotlib pieces the graph needs (may run on a helper thread)
+def import_matplotlib():
+    global HAVE_MPL, Figure, FigureCanvasTkAgg
+    try:
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+    except Exception:
+        HAVE_MPL = False
+
 # Main application class handling UI and logic
 class App:
+    # Rows inserted into the assessment Treeview per event-loop tick
+    TREE_CHUNK = 500
+    # How the Target % column spreads the marks still needed over pending assessments
+    TARGET_MODES = ("Same mark on each", "By past marks per type")
+
     # Initializes the application UI and state
     def __init__(self, root):
         self.root = root
         self.gb = GradeBook()
         self.pass_mark = tk.DoubleVar(value=50.0)
+        # Last value the pass-mark field parsed to, used while it is empty or mid-edit
+        self.last_pass_mark = 50.0
         self.current_filename = None
+        self.journal: Optional[Journal] = None
+        self.autosaver = AutoSaver(self.root, self.prepare_autosave, on_status=self.show_save_status)
 
         # Define paths for saves and resources
         if getattr(sys, 'frozen', False):
@@ -73,6 +102,8 @@ class App:
             except OSError:
                 pass
 
+        self.manifest = Manifest(self.saves_path)
+
         if USE_TTKB:
             self.root.title("Uni Grade Calculator")
         else:
@@ -182,6 +213,9 @@ class App:
         self.subject_list.pack(fill="both", expand=True, **self.pad)
         self.subject_list.bind("<<ListboxSelect>>", self.on_subject_select)
 
+        self.save_status_var = tk.StringVar(value="")
+        ttk.Label(left, textvariable=self.save_status_var, anchor="w", foreground="#666").pack(fill="x", padx=8, pady=(0, 6))
+
         topbar = ttk.Frame(right)
         topbar.pack(fill="x", **self.pad)
 
@@ -191,23 +225,47 @@ class App:
         self.sel_subject_lbl.pack(side="left", padx=6)
 
         ttk.Label(topbar, text="Pass ≥").pack(side="left", padx=(20, 4))
-        pass_spin = ttk.Spinbox(topbar, from_=0, to=100, textvariable=self.pass_mark, width=5, increment=1)
+        pass_spin = ttk.Spinbox(topbar, from_=0, to=100, textvariable=self.pass_mark, width=5, increment=1,
+                                command=self.on_subject_select)
         pass_spin.pack(side="left")
+        pass_spin.bind("<Return>", self.on_subject_select)
         ttk.Label(topbar, text="%").pack(side="left")
 
-        columns = ("name", "kind", "weight", "mark")
+        ttk.Label(topbar, text="Targets:").pack(side="left", padx=(20, 4))
+        self.target_mode = tk.StringVar(value=self.TARGET_MODES[0])
+        target_combo = ttk.Combobox(topbar, textvariable=self.target_mode, values=self.TARGET_MODES,
+                                    state="readonly", width=22)
+        target_combo.pack(side="left")
+        target_combo.bind("<<ComboboxSelected>>", self.on_subject_select)
+
+        if USE_TTKB:
+            overview_btn = tb.Button(topbar, text="All semesters…", bootstyle=SECONDARY, command=self.open_overview)
+        else:
+            overview_btn = ttk.Button(topbar, text="All semesters…", command=self.open_overview)
+        overview_btn.pack(side="right")
+
+        columns = ("name", "kind", "weight", "mark", "target")
         self.tree = ttk.Treeview(right, columns=columns, show="headings", height=12)
         self.tree.heading("name", text="Name")
         self.tree.heading("kind", text="Type")
         self.tree.heading("weight", text="Weight %")
         self.tree.heading("mark", text="Mark %")
+        self.tree.heading("target", text="Target %")
 
         self.tree.column("name", width=220, anchor="w")
         self.tree.column("kind", width=130, anchor="w")
         self.tree.column("weight", width=90, anchor="center")
         self.tree.column("mark", width=90, anchor="center")
+        self.tree.column("target", width=90, anchor="center")
         self.tree.pack(fill="both", expand=True, **self.pad)
 
+        # What the Treeview currently shows, so refreshes can diff instead of repopulating
+        self.tree_iids: List[str] = []
+        self.tree_values: List[tuple] = []
+        self.tree_subject: Optional[str] = None
+        self.tree_next_iid = 0
+        self.tree_fill_job = None
+
         ab = ttk.Frame(right)
         ab.pack(fill="x", **self.pad)
 
@@ -215,13 +273,16 @@ class App:
             add_btn = tb.Button(ab, text="Add Assessment", bootstyle=SUCCESS, command=self.add_assessment_dialog)
             edit_btn = tb.Button(ab, text="Edit", bootstyle=SECONDARY, command=self.edit_assessment_dialog)
             del_btn = tb.Button(ab, text="Delete", bootstyle=DANGER, command=self.delete_assessment)
+            self.import_btn = tb.Button(ab, text="Import CSV…", bootstyle=SECONDARY, command=self.import_csv)
         else:
             add_btn = ttk.Button(ab, text="Add Assessment", command=self.add_assessment_dialog)
             edit_btn = ttk.Button(ab, text="Edit", command=self.edit_assessment_dialog)
             del_btn = ttk.Button(ab, text="Delete", command=self.delete_assessment)
+            self.import_btn = ttk.Button(ab, text="Import CSV…", command=self.import_csv)
         add_btn.pack(side="left")
         edit_btn.pack(side="left", padx=6)
         del_btn.pack(side="left")
+        self.import_btn.pack(side="right")
 
                      
         stats = ttk.LabelFrame(right, text="Subject Stats")
@@ -233,6 +294,7 @@ class App:
         self.var_current_avg = tk.StringVar(value="—")
         self.var_needed = tk.StringVar(value="—")
         self.var_remaining_weight = tk.StringVar(value="100%")
+        self.var_pass_chance = tk.StringVar(value="—")
 
         def small(lbl, valvar):
             row = ttk.Frame(stats); row.pack(fill="x", padx=8, pady=3)
@@ -245,56 +307,113 @@ class App:
         small("Current avg on completed items:", self.var_current_avg)
         small("Required avg on remaining to pass:", self.var_needed)
         small("Remaining planned weight:", self.var_remaining_weight)
+        small("Chance of passing (simulated):", self.var_pass_chance)
+
+        # (subject, pass mark, totals) the shown pass chance belongs to, and the running simulation
+        self.sim_key = None
+        self.sim_thread = None
+        self.sim_result = None
+        # CSV import in progress: (importer, open file), stepped a chunk at a time
+        self.csv_import = None
+
+        sb = ttk.Frame(stats)
+        sb.pack(fill="x", padx=8, pady=(0, 6))
+        if USE_TTKB:
+            what_if_btn = tb.Button(sb, text="What-if…", bootstyle=SECONDARY, command=self.open_what_if)
+            self.simulate_btn = tb.Button(sb, text="Simulate", bootstyle=SECONDARY, command=self.run_simulation)
+        else:
+            what_if_btn = ttk.Button(sb, text="What-if…", command=self.open_what_if)
+            self.simulate_btn = ttk.Button(sb, text="Simulate", command=self.run_simulation)
+        what_if_btn.pack(side="right")
+        self.simulate_btn.pack(side="right", padx=6)
 
         self.graph_frame = ttk.LabelFrame(right, text="Progress Overview")
         self.graph_frame.pack(fill="both", expand=False, padx=8, pady=(0,10))
 
+        self.graph_ready = False
+        self.graph_loader = None
         if HAVE_MPL:
-            self.graph_fig = Figure(figsize=(6.0, 1.8), dpi=100)
-            self.graph_ax = self.graph_fig.add_subplot(111)
-            self.graph_canvas = FigureCanvasTkAgg(self.graph_fig, master=self.graph_frame)
-            self.graph_canvas.get_tk_widget().pack(fill="both", expand=True, padx=6, pady=6)
+            self.graph_placeholder = ttk.Label(self.graph_frame, text="Loading graph…")
         else:
             self.graph_placeholder = ttk.Label(self.graph_frame, text="Install matplotlib to see the progress graph (pip install matplotlib)")
-            self.graph_placeholder.pack(fill="x", padx=8, pady=8)
+        self.graph_placeholder.pack(fill="x", padx=8, pady=8)
 
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        # Debug panel with the tracing switch, rolling latencies and Chrome trace export
+        self.tracing_panel = None
+        self.root.bind_all("<Control-Shift-T>", lambda e: self.open_tracing_panel())
+        profiling.mark("build widgets")
 
         self.handle_startup_load()
+        profiling.mark("load last semester")
+
+    # Starts importing matplotlib on a helper thread and builds the graph once it is ready.
+    # Returns True when the graph widgets exist.
+    def ensure_graph(self) -> bool:
+        if self.graph_ready or not HAVE_MPL:
+            return self.graph_ready
+        if self.graph_loader is None:
+            self.graph_loader = threading.Thread(target=import_matplotlib, name="import-matplotlib", daemon=True)
+            self.graph_loader.start()
+            self.root.after(30, self.finish_graph_setup)
+        return False
+
+    # Polls the import thread, then creates the figure on the Tk thread and draws it
+    def finish_graph_setup(self):
+        if self.graph_loader.is_alive():
+            self.root.after(30, self.finish_graph_setup)
+            return
+        if not HAVE_MPL:
+            self.graph_placeholder.configure(text="Install matplotlib to see the progress graph (pip install matplotlib)")
+            return
+        self.graph_placeholder.destroy()
+        self.graph_fig = Figure(figsize=(6.0, 1.8), dpi=100)
+        self.graph_ax = self.graph_fig.add_subplot(111)
+        self.graph_canvas = FigureCanvasTkAgg(self.graph_fig, master=self.graph_frame)
+        self.graph_canvas.get_tk_widget().pack(fill="both", expand=True, padx=6, pady=6)
+        self.build_graph_artists()
+        self.graph_ready = True
+        profiling.mark("graph ready")
+        self.render_subject_graph()
 
     # Handles initial data loading on startup
     def handle_startup_load(self):
         self.root.withdraw()
 
         try:
-            json_files = glob.glob(os.path.join(self.saves_path, "*.json"))
-            
-            if not json_files:
+            last_file = self.manifest.most_recent()
+
+            if not last_file:
                 self.load_dummy_data()
             else:
-                json_files.sort(key=os.path.getmtime, reverse=True)
-                last_file = json_files[0]
                 self.load_custom_file(last_file)
         finally:
             self.root.deiconify()
 
-    # Loads a specific JSON file into the gradebook
+    # Loads a specific save file (JSON or binary) into the gradebook
+    @traced
     def load_custom_file(self, filepath):
+        shown = []
         try:
-            content = ""
-            with open(filepath, "r", encoding="utf-8") as f:
-                content = f.read().strip()
-            
-            if not content:
-                self.gb.subjects.clear()
-            else:
-                self.gb.load_json(content)
-                
+            # Paint the first subject while the rest of the file is still parsing
+            def on_subject(subj):
+                if not shown:
+                    shown.append(subj.title)
+                    self.refresh_subject_list(select=subj.title)
+                    self.root.update_idletasks()
+
+            self.detach_journal()
+            storage.load_path(self.gb, filepath, on_subject=on_subject)
+            self.attach_journal(filepath, replay=True)
+
             self.current_filename = filepath
+            self.manifest.touch(filepath, subjects=len(self.gb.subjects), opened=True)
             self.refresh_subject_list()
-            self.file_var.set(os.path.basename(filepath).replace(".json", ""))
+            self.file_var.set(storage.display_name(filepath))
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load file '{os.path.basename(filepath)}':\n{e}\nLoading default data.")
+            if shown:
+                self.refresh_subject_list()
             self.load_dummy_data()
 
     # Creates example data for first-time users
@@ -322,25 +441,29 @@ class App:
             self.load_dummy_data()
 
     # Updates the list of subjects in the UI
+    @traced
     def refresh_subject_list(self, select: Optional[str] = None):
         self.subject_list.delete(0, tk.END)
-        sorted_titles = sorted(self.gb.subjects.keys(), key=lambda s: s.lower())
-        for title in sorted_titles:
-            self.subject_list.insert(tk.END, title)
+        sorted_titles = self.gb.sorted_titles()
+        if sorted_titles:
+            self.subject_list.insert(tk.END, *sorted_titles)
 
         idx_to_select = 0
         if select and select in self.gb.subjects:
-            idx_to_select = sorted_titles.index(select)
+            idx_to_select = self.gb.title_position(select)
+        self.select_subject_index(idx_to_select)
 
+    # Selects the Listbox row at idx and shows that subject (or the empty state)
+    def select_subject_index(self, idx: int):
         if self.subject_list.size() > 0:
             self.subject_list.select_clear(0, tk.END)
-            self.subject_list.select_set(idx_to_select)
-            self.subject_list.activate(idx_to_select)
+            self.subject_list.select_set(idx)
+            self.subject_list.activate(idx)
+            self.subject_list.see(idx)
             self.on_subject_select()
         else:
             self.sel_subject_var.set("—")
-            for i in self.tree.get_children():
-                self.tree.delete(i)
+            self.sync_assessment_tree([], None)
             self.update_stats_panel(None)
 
     # adds a new subject with a unique name
@@ -357,9 +480,11 @@ class App:
         except ValueError as e:
             messagebox.showerror("Error", str(e))
             return
-            
-        self.refresh_subject_list(select=name)
-        self.save_file(silent=True)
+
+        idx = self.gb.title_position(name)
+        self.subject_list.insert(idx, name)
+        self.select_subject_index(idx)
+        self.request_autosave()
         self.start_inline_rename()
 
     # Starts the inline renaming process for a subject
@@ -417,15 +542,19 @@ class App:
         if not new_name or new_name == old_name:
             return
 
+        old_idx = self.gb.title_position(old_name)
         try:
             self.gb.rename_subject(old_name, new_name)
         except ValueError as e:
             messagebox.showerror("Error", str(e))
-            self.refresh_subject_list(select=old_name)
+            self.select_subject_index(old_idx)
             return
 
-        self.refresh_subject_list(select=new_name)
-        self.save_file(silent=True)
+        new_idx = self.gb.title_position(new_name)
+        self.subject_list.delete(old_idx)
+        self.subject_list.insert(new_idx, new_name)
+        self.select_subject_index(new_idx)
+        self.request_autosave()
 
     # Cancels the inline renaming process
     def cancel_inline_rename(self):
@@ -445,9 +574,11 @@ class App:
             self.del_subj_btn.configure(text="Confirm")
             self.delete_timer = self.root.after(2000, self.reset_delete_btn)
         else:
+            idx = self.gb.title_position(subj)
             self.gb.remove_subject(subj)
-            self.refresh_subject_list()
-            self.save_file(silent=True)
+            self.subject_list.delete(idx)
+            self.select_subject_index(0)
+            self.request_autosave()
             self.reset_delete_btn()
     
     # Resets the delete button state
@@ -466,6 +597,7 @@ class App:
         return self.subject_list.get(sel[0])
 
     # Handles subject selection change
+    @traced
     def on_subject_select(self, _evt=None):
         subj = self.current_subject_title()
         if not subj:
@@ -475,14 +607,91 @@ class App:
             self.cancel_inline_rename()
         
         self.sel_subject_var.set(subj if subj else "—")
-        for i in self.tree.get_children():
-            self.tree.delete(i)
-        if subj:
-            for a in self.gb.subjects[subj].assessments:
-                mark_txt = "—" if a.mark is None else f"{a.mark:.2f}"
-                self.tree.insert("", tk.END, values=(a.name, a.kind, f"{a.weight:.2f}", mark_txt))
+        self.sync_assessment_tree(self.assessment_rows(subj), subj)
         self.update_stats_panel(subj)
-        self.render_subject_graph()
+
+    # The pass mark in the spinbox, or the last valid one while the field can't be parsed
+    def current_pass_mark(self) -> float:
+        try:
+            self.last_pass_mark = self.pass_mark.get()
+        except tk.TclError:
+            pass
+        return self.last_pass_mark
+
+    # Formats a subject's assessments as Treeview rows straight from the columns, with the
+    # per-assessment marks needed to reach the pass mark re-solved on every refresh
+    def assessment_rows(self, subj_title: str) -> List[tuple]:
+        a = self.gb.subjects[subj_title].assessments
+        targets = [""] * len(a)
+        from calculations import solve_targets
+        ease = None
+        if self.target_mode.get() == self.TARGET_MODES[1]:
+            from simulation import fit_mark_models
+            models = fit_mark_models(a)
+            overall = max(models[None][0], 1.0)
+            ease = {kind: mean / overall for kind, (mean, _sd) in models.items() if kind is not None}
+        plan = solve_targets(a, self.current_pass_mark(), ease)
+        for i, mark in zip(plan["pending"], plan["marks"]):
+            targets[i] = f"{mark:.2f}" if plan["feasible"] else "✗"
+        return [(name, kind, f"{weight:.2f}", "—" if mark != mark else f"{mark:.2f}", target)
+                for name, kind, weight, mark, target in zip(a.names, a.kinds, a.weights, a.marks, targets)]
+
+    # Brings the Treeview in line with rows, touching only what changed: the common
+    # prefix and suffix are kept, overlapping middle rows are updated in place and the
+    # rest inserted or deleted. Large inserts are fed in TREE_CHUNK-row batches from
+    # the event loop so the first rows show at once. Row iids are positional, so a
+    # selection is dropped when the rows belong to a different subject.
+    @traced
+    def sync_assessment_tree(self, rows: List[tuple], subject: Optional[str]):
+        if self.tree_fill_job is not None:
+            self.root.after_cancel(self.tree_fill_job)
+            self.tree_fill_job = None
+        if subject != self.tree_subject:
+            self.tree.selection_set(())
+            self.tree_subject = subject
+
+        old = self.tree_values
+        limit = min(len(old), len(rows))
+        p = 0
+        while p < limit and old[p] == rows[p]:
+            p += 1
+        q = 0
+        while q < limit - p and old[-1 - q] == rows[-1 - q]:
+            q += 1
+
+        old_mid = range(p, len(old) - q)
+        new_mid = rows[p:len(rows) - q]
+        overlap = min(len(old_mid), len(new_mid))
+
+        for k in range(overlap):
+            i = p + k
+            if old[i] != new_mid[k]:
+                self.tree.item(self.tree_iids[i], values=new_mid[k])
+                old[i] = new_mid[k]
+
+        start = p + overlap
+        if len(old_mid) > overlap:
+            end = len(old) - q
+            self.tree.delete(*self.tree_iids[start:end])
+            del self.tree_iids[start:end]
+            del self.tree_values[start:end]
+        elif len(new_mid) > overlap:
+            self.insert_tree_rows(start, new_mid[overlap:])
+
+    # Inserts rows at index, scheduling any beyond the first chunk for later ticks
+    def insert_tree_rows(self, index: int, rows: List[tuple]):
+        self.tree_fill_job = None
+        batch, rest = rows[:self.TREE_CHUNK], rows[self.TREE_CHUNK:]
+        iids = []
+        for offset, values in enumerate(batch):
+            iid = f"a{self.tree_next_iid}"
+            self.tree_next_iid += 1
+            self.tree.insert("", index + offset, iid=iid, values=values)
+            iids.append(iid)
+        self.tree_iids[index:index] = iids
+        self.tree_values[index:index] = batch
+        if rest:
+            self.tree_fill_job = self.root.after(1, self.insert_tree_rows, index + len(batch), rest)
 
     # Opens dialog to add a new assessment
     def add_assessment_dialog(self):
@@ -497,10 +706,73 @@ class App:
             try:
                 self.gb.add_assessment(subj, a)
                 self.on_subject_select()
-                self.save_file(silent=True)
+                self.request_autosave()
             except Exception as e:
                 messagebox.showerror("Error", str(e))
 
+    # Appends assessments from a CSV file, one chunk per event-loop turn so the window stays
+    # responsive; rows without a subject column go to the selected subject
+    def import_csv(self):
+        if self.csv_import is not None:
+            return
+        path = filedialog.askopenfilename(filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
+                                          title="Import Assessments from CSV")
+        if not path:
+            return
+        from csvimport import CsvImporter
+        f = None
+        try:
+            f = open(path, "r", encoding="utf-8-sig", newline="")
+            importer = CsvImporter(self.gb, f, default_subject=self.current_subject_title())
+        except (OSError, ValueError, UnicodeDecodeError) as e:
+            if f is not None:
+                f.close()
+            messagebox.showerror("Import CSV", f"Could not import {os.path.basename(path)}:\n{e}")
+            return
+        self.csv_import = (importer, f)
+        self.set_file_actions_enabled(False)
+        self.root.after(1, self.step_csv_import)
+
+    # Imports the next chunk of the running CSV import, then saves and reports once it is done
+    def step_csv_import(self):
+        importer, f = self.csv_import
+        try:
+            more = importer.step()
+        except Exception as e:
+            more, error = False, e
+        else:
+            error = None
+        report = importer.report
+        if more:
+            self.save_status_var.set(f"Importing… {report.rows:,} row(s) read")
+            self.root.after(1, self.step_csv_import)
+            return
+        f.close()
+        self.refresh_subject_list(select=self.current_subject_title())
+        if report.imported and self.current_filename:
+            self.save_file(silent=True, full=True)
+        self.csv_import = None
+        self.set_file_actions_enabled(True)
+        self.save_status_var.set(report.summary())
+        if report.imported and not self.current_filename:
+            self.request_autosave()
+        lines = [report.summary()]
+        if error is not None:
+            lines.append(f"Stopped early: {error}")
+        lines += [f"Line {line}: {message}" for line, message in report.errors[:10]]
+        if report.failed > 10:
+            lines.append(f"… and {report.failed - 10} more")
+        show = messagebox.showwarning if report.failed or error is not None else messagebox.showinfo
+        show("Import CSV", "\n".join(lines))
+
+    # Turns off the actions that would put another semester in self.gb while a CSV import
+    # is still appending to it (the importer holds on to the gradebook, not the file)
+    def set_file_actions_enabled(self, enabled: bool):
+        state = "normal" if enabled else "disabled"
+        for btn in (self.import_btn, self.new_file_btn, self.del_file_btn):
+            btn.configure(state=state)
+        self.file_combo.configure(state="readonly" if enabled else "disabled")
+
     # Gets index of selected assessment in the treeview
     def selected_assessment_index(self) -> Optional[int]:
         sel = self.tree.selection()
@@ -519,9 +791,9 @@ class App:
         dlg = AssessmentDialog(self.root, title="Edit Assessment", initial=a)
         self.root.wait_window(dlg.top)
         if dlg.result:
-            self.gb.subjects[subj].assessments[idx] = dlg.result
+            self.gb.replace_assessment(subj, idx, dlg.result)
             self.on_subject_select()
-            self.save_file(silent=True)
+            self.request_autosave()
 
     # Deletes the selected assessment
     def delete_assessment(self):
@@ -533,9 +805,10 @@ class App:
         if messagebox.askyesno("Delete", "Delete selected assessment?"):
             self.gb.delete_assessment(subj, idx)
             self.on_subject_select()
-            self.save_file(silent=True)
+            self.request_autosave()
 
     # Updates the statistics panel for a subject
+    @traced
     def update_stats_panel(self, subj_title: Optional[str]):
         if not subj_title:
             self.var_completed_weight.set("0%")
@@ -544,13 +817,12 @@ class App:
             self.var_current_avg.set("—")
             self.var_needed.set("—")
             self.var_remaining_weight.set("100%")
-            if HAVE_MPL:
-                if hasattr(self, 'graph_ax'): self.graph_ax.clear()
-                if hasattr(self, 'graph_canvas'): self.graph_canvas.draw()
+            self.var_pass_chance.set("—")
+            self.sim_key = None
+            self.schedule_graph_render()
             return
 
-        subj = self.gb.subjects[subj_title]
-        stats = compute_stats(subj.assessments, pass_mark=self.pass_mark.get())
+        stats = self.gb.stats(subj_title, pass_mark=self.current_pass_mark())
 
         self.var_completed_weight.set(f"{stats['completed_weight']:.2f}%")
         self.var_planned_weight.set(f"{stats['planned_weight']:.2f}%")
@@ -567,16 +839,137 @@ class App:
             self.var_needed.set(f"{stats['needed_avg_remaining']:.2f}%")
 
         self.var_remaining_weight.set(f"{stats['remaining_planned_weight']:.2f}%")
-        self.render_subject_graph()
+        if self.sim_key != self.simulation_key(subj_title):
+            self.sim_key = None
+            self.var_pass_chance.set("—")
+        self.schedule_graph_render()
+
+    # Identifies the inputs a pass-chance simulation depends on
+    def simulation_key(self, subj_title: str):
+        s = self.gb.subjects[subj_title]
+        return (subj_title, self.current_pass_mark(), len(s.assessments), s.completed_weight, s.planned_weight, s.contributed)
+
+    # Starts a seeded Monte Carlo pass-chance estimate for the selected subject on a helper thread
+    def run_simulation(self):
+        subj_title = self.current_subject_title()
+        if not subj_title:
+            messagebox.showinfo("Simulate", "Select a subject first.")
+            return
+        if self.sim_thread is not None:
+            return
+        import simulation
+        if not simulation.HAVE_NUMPY:
+            messagebox.showerror("Simulate", "Simulation requires numpy (pip install numpy).")
+            return
+        key = self.simulation_key(subj_title)
+        assessments = list(self.gb.subjects[subj_title].assessments)
+        pass_mark = self.current_pass_mark()
+
+        def job():
+            try:
+                self.sim_result = (key, simulation.pass_probability(assessments, pass_mark, seed=0))
+            except Exception as e:
+                self.sim_result = (key, e)
+
+        self.var_pass_chance.set("Simulating…")
+        self.simulate_btn.configure(state="disabled")
+        self.sim_thread = threading.Thread(target=job, name="simulate", daemon=True)
+        self.sim_thread.start()
+        self.root.after(50, self.poll_simulation)
+
+    # Shows the simulation result once the helper thread is done
+    def poll_simulation(self):
+        if self.sim_thread.is_alive():
+            self.root.after(50, self.poll_simulation)
+            return
+        self.sim_thread = None
+        self.simulate_btn.configure(state="normal")
+        key, result = self.sim_result
+        self.sim_result = None
+        subj_title = self.current_subject_title()
+        if not subj_title or self.simulation_key(subj_title) != key:
+            self.var_pass_chance.set("—")
+            return
+        if isinstance(result, Exception):
+            self.var_pass_chance.set("—")
+            messagebox.showerror("Simulate", f"Simulation failed:\n{result}")
+            return
+        self.sim_key = key
+        self.var_pass_chance.set(f"{result['pass_probability'] * 100:.1f}% "
+                                 f"(95% CI {result['ci_low'] * 100:.1f}–{result['ci_high'] * 100:.1f}%)")
+
+    # Shows the tracing panel, creating it if needed
+    def open_tracing_panel(self):
+        if self.tracing_panel is not None and self.tracing_panel.top.winfo_exists():
+            self.tracing_panel.top.lift()
+            return
+        self.tracing_panel = TracingPanel(self.root)
+
+    # Opens the cross-semester overview, recomputing only semesters changed since last time
+    def open_overview(self):
+        if self.current_filename and self.gb.subjects:
+            self.save_file(silent=True)
+        from aggregate import Aggregator
+        OverviewDialog(self.root, Aggregator(self.saves_path))
+
+    # Opens the what-if scenarios for the selected subject
+    def open_what_if(self):
+        subj_title = self.current_subject_title()
+        if not subj_title:
+            messagebox.showinfo("What-if", "Select a subject first.")
+            return
+        import calculations
+        if not calculations.HAVE_NUMPY:
+            messagebox.showerror("What-if", "What-if scenarios require numpy (pip install numpy).")
+            return
+        assessments = self.gb.subjects[subj_title].assessments
+        grid = calculations.what_if_grid(assessments)
+        WhatIfDialog(self.root, subj_title, [assessments[i].name for i in grid["pending"]], grid)
+
+    # Creates the graph's patches and labels once; later renders only move and relabel them
+    def build_graph_artists(self):
+        from matplotlib.patches import Rectangle
+
+        ax = self.graph_ax
+        ax.set_xlim(0, 100)
+        ax.set_ylim(0, 1)
+        ax.axis("off")
+        ax.add_patch(Rectangle((0, 0.2), 100, 0.6, fill=False, linewidth=2.0, edgecolor="#000000"))
+
+        self.graph_segments = []
+        for color, label in (("#B6E51C", "Contribution so far"),
+                             ("#00A8E8", "Completed weight"),
+                             ("#3F51B5", "Planned Weight")):
+            bar = ax.add_patch(Rectangle((0, 0.2), 0, 0.6, color=color, visible=False))
+            caption = ax.text(0, 0.92, label, ha="center", va="bottom", fontsize=9, visible=False)
+            value = ax.text(0, 0.24, "", ha="right", va="bottom", fontsize=8, color="#111", visible=False)
+            self.graph_segments.append((bar, caption, value))
+
+        self.graph_fig.tight_layout()
+        self.graph_redraw_pending = False
+
+    # Coalesces graph refreshes so several requests in one event-loop tick draw once
+    def schedule_graph_render(self):
+        if getattr(self, "graph_redraw_pending", False):
+            return
+        self.graph_redraw_pending = True
+        self.root.after_idle(self.render_subject_graph)
 
     # Draws the progress bar graph
+    @traced
     def render_subject_graph(self):
+        self.graph_redraw_pending = False
         subj_title = self.current_subject_title()
-        if not subj_title or not HAVE_MPL:
+        if not self.ensure_graph():
+            return
+        if not subj_title:
+            for artists in self.graph_segments:
+                for artist in artists:
+                    artist.set_visible(False)
+            self.graph_canvas.draw_idle()
             return
 
-        subj = self.gb.subjects[subj_title]
-        stats = compute_stats(subj.assessments, pass_mark=self.pass_mark.get())
+        stats = self.gb.stats(subj_title, pass_mark=self.current_pass_mark())
 
         planned = max(0.0, min(stats["planned_weight"], 100.0))
         completed = max(0.0, min(stats["completed_weight"], 100.0))
@@ -586,74 +979,55 @@ class App:
         seg_completed_loss = max(0.0, min(completed - contribution, 100.0 - seg_contrib))
         seg_planned_remaining = max(0.0, min(planned - completed, 100.0 - seg_contrib - seg_completed_loss))
 
-        col_contrib = "#B6E51C"
-        col_completed_loss = "#00A8E8"
-        col_planned_remaining = "#3F51B5"
-        border_color = "#000000"
-
-        ax = self.graph_ax
-        fig = self.graph_fig
-        ax.clear()
-        ax.set_xlim(0, 100)
-        ax.set_ylim(0, 1)
-        ax.axis("off")
-
-        ax.add_patch(
-            __import__("matplotlib").patches.Rectangle((0, 0.2), 100, 0.6, fill=False, linewidth=2.0, edgecolor=border_color)
+        spans = (
+            (seg_contrib, f"{contribution:.1f}%"),
+            (seg_completed_loss, f"{max(0.0, completed - contribution):.1f}%"),
+            (seg_planned_remaining, f"{max(0.0, planned - completed):.1f}%"),
         )
 
         x = 0.0
-        if seg_contrib > 0:
-            ax.add_patch(__import__("matplotlib").patches.Rectangle((x, 0.2), seg_contrib, 0.6, color=col_contrib))
-            x += seg_contrib
-        if seg_completed_loss > 0:
-            ax.add_patch(__import__("matplotlib").patches.Rectangle((x, 0.2), seg_completed_loss, 0.6, color=col_completed_loss))
-            x += seg_completed_loss
-        if seg_planned_remaining > 0:
-            ax.add_patch(__import__("matplotlib").patches.Rectangle((x, 0.2), seg_planned_remaining, 0.6, color=col_planned_remaining))
-            x += seg_planned_remaining
-
-        def label_if(space, center, text):
-            if space >= 6:
-                ax.text(center, 0.92, text, ha="center", va="bottom", fontsize=9)
-
-        c1 = seg_contrib / 2.0
-        c2 = seg_contrib + seg_completed_loss / 2.0
-        c3 = seg_contrib + seg_completed_loss + seg_planned_remaining / 2.0
-
-        label_if(seg_contrib, c1, "Contribution so far")
-        label_if(seg_completed_loss, c2, "Completed weight")
-        label_if(seg_planned_remaining, c3, "Planned Weight")
-
-        def value_if(space, x0, text):
-            if space >= 10:
-                ax.text(x0 + space - 1.5, 0.24, text, ha="right", va="bottom", fontsize=8, color="#111")
-
-        value_if(seg_contrib, 0.0, f"{contribution:.1f}%")
-        value_if(seg_completed_loss, seg_contrib, f"{max(0.0, completed - contribution):.1f}%")
-        value_if(seg_planned_remaining, seg_contrib + seg_completed_loss, f"{max(0.0, planned - completed):.1f}%")
-
-        fig.tight_layout()
-        self.graph_canvas.draw()
+        for (bar, caption, value), (space, text) in zip(self.graph_segments, spans):
+            bar.set_x(x)
+            bar.set_width(space)
+            bar.set_visible(space > 0)
+            caption.set_x(x + space / 2.0)
+            caption.set_visible(space >= 6)
+            value.set_x(x + space - 1.5)
+            value.set_text(text)
+            value.set_visible(space >= 10)
+            x += space
+
+        self.graph_canvas.draw_idle()
 
     # Handles window closure, ensuring data is saved
     def on_close(self):
-        if self.current_filename:
-            self.save_file(silent=True)
-        self.root.destroy()
+        try:
+            if self.current_filename:
+                self.save_file(silent=True, full=True)
+            self.attach_journal(None)
+            if self.current_filename:
+                self.manifest.touch(self.current_filename, subjects=len(self.gb.subjects))
+            self.manifest.save()
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to save:\n{e}")
+        finally:
+            self.autosaver.stop()
+            self.root.destroy()
 
     # Creates a new semester file
     def new_file(self):
+        if self.csv_import is not None:
+            return
         if self.current_filename:
             self.save_file(silent=True)
-        
-        self.gb.subjects.clear()
+        self.detach_journal()
+        self.gb.clear()
         self.current_filename = None
         self.refresh_subject_list()
         base = "Untitled Semester"
         name = base
         count = 1
-        while os.path.exists(os.path.join(self.saves_path, f"{name}.json")):
+        while os.path.exists(self.path_for_name(name)):
             name = f"{base} ({count})"
             count += 1
         
@@ -664,8 +1038,10 @@ class App:
         self.file_var.set(name)
         self.refresh_file_list()
 
-    # Saves the current gradebook to JSON
-    def save_file(self, silent=False) -> bool:
+    # Saves the current gradebook, in the format given by its file extension.
+    # Silent saves only append the latest edits to the journal unless full=True.
+    @traced
+    def save_file(self, silent=False, full=False) -> bool:
         if self.current_filename:
             path = self.current_filename
         else:
@@ -675,29 +1051,114 @@ class App:
         if not path:
             return False
         try:
-            with open(path, "w", encoding="utf-8") as f:
-                f.write(self.gb.as_json())
+            self.autosaver.flush()
+            if self.csv_import is not None and self.journal and self.journal.save_path == path:
+                self.journal.snapshot()
+            elif silent and not full and self.journal and self.journal.save_path == path and os.path.exists(path):
+                self.journal.raise_error()
+                self.journal.flush()
+                if self.journal.needs_compaction():
+                    self.journal.compact(background=True)
+            else:
+                if not self.journal or self.journal.save_path != path:
+                    self.attach_journal(path)
+                self.journal.compact()
             if not silent:
                 self.refresh_file_list()
                 if self.current_filename:
-                    self.file_var.set(os.path.basename(self.current_filename).replace(".json", ""))
+                    self.file_var.set(storage.display_name(self.current_filename))
             return True
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save:\n{e}")
             return False
 
+    # Queues a debounced background save after an edit
+    def request_autosave(self):
+        if not self.current_filename:
+            self.save_file(silent=True)
+            return
+        self.autosaver.request()
+
+    # Runs on the Tk thread when an autosave fires: captures the edits (and a snapshot
+    # if the journal is due for compaction) and returns the disk work for the writer thread.
+    # While a CSV import runs, the imported rows aren't journaled, so edits made in between
+    # would not replay onto the save file: those saves write a snapshot instead.
+    @traced
+    def prepare_autosave(self):
+        path = self.current_filename
+        if not path:
+            return None
+        j = self.journal
+        if j is not None and j.save_path == path and self.csv_import is not None:
+            j.take()
+            data = storage.encode_snapshot(self.gb, path)
+
+            def job():
+                j.wait()
+                j.write_snapshot(data)
+            return job
+        if j is not None and j.save_path == path and os.path.exists(path):
+            lines = j.take()
+            data = storage.encode_snapshot(self.gb, path) if j.needs_compaction() else None
+
+            def job():
+                j.write(lines)
+                if data is not None:
+                    j.write_snapshot(data)
+            return job
+        data = storage.encode_snapshot(self.gb, path)
+        return lambda: storage.write_atomic(path, data)
+
+    # Shows autosave latency and queue depth under the subject list
+    def show_save_status(self, status):
+        if status["error"] is not None:
+            self.autosaver.error = None
+            self.save_status_var.set("Save failed")
+            messagebox.showerror("Error", f"Failed to save:\n{status['error']}")
+        elif status["queue_depth"]:
+            self.save_status_var.set(f"Saving… ({status['queue_depth']} queued)")
+        elif status["last_latency_ms"] is not None:
+            self.save_status_var.set(f"All changes saved ({status['last_latency_ms']:.0f} ms, "
+                                     f"avg {status['avg_latency_ms']:.0f} ms)")
+
+    # Writes out any pending autosave and journal records for the current file, then stops
+    # journaling. Call before self.gb is replaced, so nothing of the next file reaches this one.
+    def detach_journal(self):
+        self.autosaver.flush()
+        if self.journal:
+            if self.csv_import is not None:
+                self.journal.snapshot()
+            self.journal.close()
+            self.journal = None
+
+    # Switches the mutation journal to the given save file, optionally replaying its pending edits
+    def attach_journal(self, path: Optional[str], replay: bool = False):
+        self.detach_journal()
+        if path:
+            self.journal = Journal(path, self.gb)
+            if replay:
+                self.journal.replay()
+
     # Updates the file selection dropdown
     def refresh_file_list(self):
-        json_files = glob.glob(os.path.join(self.saves_path, "*.json"))
-        names = [os.path.basename(f).replace(".json", "") for f in json_files]
-        names.sort(key=str.lower)
-        self.file_combo["values"] = names
+        self.manifest.refresh()
+        self.file_combo["values"] = self.manifest.names()
+
+    # Finds the save file for a display name, preferring an existing file of either format
+    def path_for_name(self, name: str) -> str:
+        for ext in storage.SAVE_EXTENSIONS:
+            path = os.path.join(self.saves_path, f"{name}{ext}")
+            if os.path.exists(path):
+                return path
+        return os.path.join(self.saves_path, f"{name}{storage.JSON_EXT}")
 
     # Loads a file when selected from dropdown
     def on_file_selected(self, event):
+        if self.csv_import is not None:
+            return
         name = self.file_var.get()
         if not name: return
-        path = os.path.join(self.saves_path, f"{name}.json")
+        path = self.path_for_name(name)
         if os.path.exists(path):
             self.load_custom_file(path)
             self.root.focus_set()
@@ -739,7 +1200,8 @@ class App:
             self.toggle_rename_mode()
             return
 
-        new_path = os.path.join(self.saves_path, f"{new_name}.json")
+        ext = os.path.splitext(self.current_filename)[1] if self.current_filename else storage.JSON_EXT
+        new_path = os.path.join(self.saves_path, f"{new_name}{ext}")
 
         if os.path.exists(new_path) and (self.current_filename is None or new_path != self.current_filename):
             if not messagebox.askyesno("Overwrite", f"File '{new_name}' already exists. Overwrite?"):
@@ -747,8 +1209,12 @@ class App:
 
         if self.current_filename and os.path.exists(self.current_filename):
             try:
+                self.save_file(silent=True, full=True)
+                self.attach_journal(None)
+                journal.discard(new_path)
                 os.rename(self.current_filename, new_path)
                 self.current_filename = new_path
+                self.attach_journal(new_path)
                 self.file_var.set(new_name)
                 self.refresh_file_list()
 
@@ -771,6 +1237,8 @@ class App:
 
     # Deletes the current file
     def delete_current_file(self):
+        if self.csv_import is not None:
+            return
         if not self.current_filename or not os.path.exists(self.current_filename):
             return
 
@@ -786,25 +1254,23 @@ class App:
             
             try:
                                                              
-                json_files = glob.glob(os.path.join(self.saves_path, "*.json"))
-                target_abs = os.path.abspath(target_to_delete)
-                candidates = [f for f in json_files if os.path.abspath(f) != target_abs]
+                self.manifest.refresh()
+                candidate = self.manifest.most_recent(exclude=target_to_delete)
 
-                candidates.sort(key=os.path.getmtime, reverse=True)
-
-                if candidates:
-                    self.load_custom_file(candidates[0])
+                if candidate:
+                    self.load_custom_file(candidate)
                 else:
                     self.current_filename = None
                     self.new_file()
 
                 if os.path.exists(target_to_delete):
                     os.remove(target_to_delete)
+                journal.discard(target_to_delete)
 
                 self.refresh_file_list()
 
                 if self.current_filename:
-                    name = os.path.basename(self.current_filename).replace(".json", "")
+                    name = storage.display_name(self.current_filename)
                     self.file_var.set(name)
 
             except Exception as e:
@@ -820,16 +1286,20 @@ class App:
 
     # Opens file dialog to load a file
     def load_file(self):
+        if self.csv_import is not None:
+            return
         path = filedialog.askopenfilename(
             initialdir=self.saves_path,
-            filetypes=[("JSON files", "*.json"), ("All files", "*.*")],
+            filetypes=[("Grade books", "*.json *.ugcb"), ("JSON files", "*.json"),
+                       ("Binary grade books", "*.ugcb"), ("All files", "*.*")],
             title="Load Grade Book"
         )
         if not path:
             return
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                self.gb.load_json(f.read())
+            self.detach_journal()
+            storage.load_path(self.gb, path)
+            self.attach_journal(path, replay=True)
             self.current_filename = path
             self.refresh_subject_list()
         except Exception as e:
@@ -915,33 +1385,17 @@ class AssessmentDialog:
         name = self.name_var.get().strip()
         kind = self.kind_var.get().strip() or "Assessment"
         try:
-            weight = float(self.weight_var.get().strip())
-        except Exception:
-            messagebox.showerror("Invalid Input", "Weight must be a number.")
-            return
-        if weight < 0 or weight > 1000:
-            messagebox.showerror("Invalid Input", "Weight must be between 0 and 1000%.")
+            weight = parse_weight(self.weight_var.get())
+        except ValueError as e:
+            messagebox.showerror("Invalid Input", str(e))
             return
 
-        mark_str = self.mark_var.get().strip()
-        mark = None
-        if mark_str != "":
-            try:
-                if "/" in mark_str:
-                    num, denom = mark_str.split("/")
-                    num = float(num.strip())
-                    denom = float(denom.strip())
-                    if denom <= 0:
-                        raise ValueError("Denominator must be > 0")
-                    mark = (num / denom) * 100.0
-                else:
-                    mark = float(mark_str)
-                if mark < 0 or mark > 100:
-                    raise ValueError("Mark must be between 0 and 100 after conversion.")
-            except Exception as e:
-                messagebox.showerror("Invalid Input", f"Mark must be a number (e.g., 75) "
-                                                     f"or fraction (e.g., 14/20).\nError: {e}")
-                return
+        try:
+            mark = parse_mark(self.mark_var.get())
+        except Exception as e:
+            messagebox.showerror("Invalid Input", f"Mark must be a number (e.g., 75) "
+                                                 f"or fraction (e.g., 14/20).\nError: {e}")
+            return
 
         if not name:
             messagebox.showerror("Invalid Input", "Please enter a name for the assessment.")
@@ -950,6 +1404,222 @@ class AssessmentDialog:
         self.result = Assessment(name=name, kind=kind, weight=weight, mark=mark)
         self.top.destroy()
 
+# Debug panel: turns tracing on and off, shows p50/p95/max of the last calls per span
+# (refreshed twice a second while open) and exports the spans as Chrome trace JSON
+class TracingPanel:
+    REFRESH_MS = 500
+    COLUMNS = (("span", "Span", 240, "w"), ("calls", "Calls", 60, "center"), ("last", "Last ms", 80, "center"),
+               ("p50", "p50 ms", 80, "center"), ("p95", "p95 ms", 80, "center"), ("max", "Max ms", 80, "center"))
+
+    # Initializes the panel and starts the refresh loop
+    def __init__(self, master):
+        self.top = tk.Toplevel(master)
+        self.top.title("Tracing")
+        self.top.transient(master)
+
+        frm = ttk.Frame(self.top, padding=10)
+        frm.pack(fill="both", expand=True)
+
+        bar = ttk.Frame(frm)
+        bar.pack(fill="x", pady=(0, 6))
+        self.enabled_var = tk.BooleanVar(value=tracing.is_enabled())
+        ttk.Checkbutton(bar, text="Record spans", variable=self.enabled_var,
+                        command=lambda: tracing.set_enabled(self.enabled_var.get())).pack(side="left")
+        ttk.Button(bar, text="Export Chrome trace…", command=self.export).pack(side="right")
+        ttk.Button(bar, text="Clear", command=self.clear).pack(side="right", padx=6)
+
+        self.table = ttk.Treeview(frm, columns=[c[0] for c in self.COLUMNS], show="headings", height=14)
+        for key, text, width, anchor in self.COLUMNS:
+            self.table.heading(key, text=text)
+            self.table.column(key, width=width, anchor=anchor)
+        self.table.pack(fill="both", expand=True)
+        self.top.bind("<Escape>", lambda e: self.top.destroy())
+        self.refresh()
+
+    # Updates the latency table in place, slowest p95 first
+    def refresh(self):
+        if not self.top.winfo_exists():
+            return
+        rows = tracing.summary()
+        names = [r[0] for r in rows]
+        for iid in set(self.table.get_children()) - set(names):
+            self.table.delete(iid)
+        for index, (name, calls, last, p50, p95, worst) in enumerate(rows):
+            values = (name, calls, f"{last:.2f}", f"{p50:.2f}", f"{p95:.2f}", f"{worst:.2f}")
+            if self.table.exists(name):
+                self.table.item(name, values=values)
+                self.table.move(name, "", index)
+            else:
+                self.table.insert("", index, iid=name, values=values)
+        self.top.after(self.REFRESH_MS, self.refresh)
+
+    # Drops the recorded spans
+    def clear(self):
+        tracing.clear()
+        self.table.delete(*self.table.get_children())
+
+    # Saves the recorded spans for chrome://tracing or Perfetto
+    def export(self):
+        path = filedialog.asksaveasfilename(parent=self.top, title="Export Chrome trace", defaultextension=".json",
+                                            filetypes=[("Trace JSON", "*.json")], initialfile="gradecalc-trace.json")
+        if not path:
+            return
+        try:
+            count = tracing.export_chrome(path)
+        except OSError as e:
+            messagebox.showerror("Export failed", str(e), parent=self.top)
+            return
+        messagebox.showinfo("Trace exported", f"Wrote {count} span(s) to\n{path}", parent=self.top)
+
+# Lists the weighted average and GPA of every semester plus the overall figures.
+# The aggregate is refreshed on a helper thread so a large archive never blocks the window.
+class OverviewDialog:
+    COLUMNS = (("semester", "Semester", 180, "w"), ("subjects", "Subjects", 70, "center"),
+               ("weighted_average", "Weighted avg %", 110, "center"), ("subject_average", "Subject avg %", 110, "center"),
+               ("gpa", "GPA (7-pt)", 80, "center"))
+
+    # Initializes the overview and starts the refresh
+    def __init__(self, master, aggregator):
+        self.aggregator = aggregator
+        self.result = None
+        self.top = tk.Toplevel(master)
+        self.top.title("All Semesters")
+        self.top.transient(master)
+
+        frm = ttk.Frame(self.top, padding=10)
+        frm.pack(fill="both", expand=True)
+        self.table = ttk.Treeview(frm, columns=[c[0] for c in self.COLUMNS], show="headings", height=14)
+        for key, text, width, anchor in self.COLUMNS:
+            self.table.heading(key, text=text)
+            self.table.column(key, width=width, anchor=anchor)
+        self.table.pack(fill="both", expand=True)
+        self.status_var = tk.StringVar(value="Calculating…")
+        ttk.Label(frm, textvariable=self.status_var).pack(fill="x", pady=(6, 0))
+        self.top.bind("<Escape>", lambda e: self.top.destroy())
+
+        self.worker = threading.Thread(target=self.run, name="overview", daemon=True)
+        self.worker.start()
+        self.top.after(30, self.poll)
+
+    # Thread target: refreshes the aggregate
+    def run(self):
+        try:
+            self.result = self.aggregator.refresh()
+        except Exception as e:
+            self.result = e
+
+    # Fills the table once the refresh is done
+    def poll(self):
+        if self.worker.is_alive():
+            self.top.after(30, self.poll)
+            return
+        if isinstance(self.result, Exception):
+            self.status_var.set(f"Failed to compute the overview: {self.result}")
+            return
+        rows, overall = self.result
+
+        def cell(row, key):
+            value = row[key]
+            if row["error"] and key != "semester":
+                return "error" if key == "subjects" else ""
+            if value is None:
+                return "—"
+            return f"{value:.2f}" if isinstance(value, float) else value
+
+        for row in rows + [overall]:
+            self.table.insert("", "end", values=[cell(row, key) for key, *_ in self.COLUMNS])
+        from aggregate import GRADE_SCALE
+        scale = ", ".join(f"{grade} ≥{minimum:g} = {points:g}" for minimum, grade, points in GRADE_SCALE[:-1])
+        self.status_var.set(f"{len(rows)} semester(s); {len(self.aggregator.recomputed)} recalculated. "
+                            f"GPA: {scale}, else {GRADE_SCALE[-1][2]:g}.")
+
+# Shows the needed average on the remaining weight for every target pass mark, either as
+# things stand or with a hypothetical mark on one pending assessment. Draws a heatmap when
+# matplotlib is available and a table otherwise.
+class WhatIfDialog:
+    # Spacing of the target columns in the table (the heatmap shows every target)
+    TABLE_STEP = 10.0
+
+    # Initializes the what-if dialog for one subject's precomputed grid
+    def __init__(self, master, subj_title: str, pending_names: List[str], grid):
+        self.grid = grid
+        self.top = tk.Toplevel(master)
+        self.top.title(f"What-if: {subj_title}")
+        self.top.transient(master)
+
+        frm = ttk.Frame(self.top, padding=10)
+        frm.pack(fill="both", expand=True)
+
+        row = ttk.Frame(frm)
+        row.pack(fill="x", pady=(0, 6))
+        ttk.Label(row, text="Scenario").pack(side="left", padx=(0, 6))
+        self.choices = ["As things stand"] + [f"Mark on {name}" for name in pending_names]
+        self.scenario_var = tk.StringVar(value=self.choices[1] if pending_names else self.choices[0])
+        combo = ttk.Combobox(row, textvariable=self.scenario_var, values=self.choices, state="readonly", width=40)
+        combo.pack(side="left")
+        combo.bind("<<ComboboxSelected>>", lambda e: self.render())
+
+        if HAVE_MPL and Figure is None:
+            import_matplotlib()
+        if HAVE_MPL:
+            self.fig = Figure(figsize=(7.0, 4.2), dpi=100)
+            self.ax = self.fig.add_subplot(111)
+            self.colorbar = None
+            self.canvas = FigureCanvasTkAgg(self.fig, master=frm)
+            self.canvas.get_tk_widget().pack(fill="both", expand=True)
+        else:
+            targets = grid["targets"]
+            spacing = targets[1] - targets[0] if len(targets) > 1 else self.TABLE_STEP
+            self.table_stride = max(1, int(round(self.TABLE_STEP / spacing)))
+            shown = targets[::self.table_stride]
+            columns = ["mark"] + [f"t{i}" for i in range(len(shown))]
+            self.table = ttk.Treeview(frm, columns=columns, show="headings", height=16)
+            self.table.heading("mark", text="Mark %")
+            self.table.column("mark", width=70, anchor="center")
+            for col, t in zip(columns[1:], shown):
+                self.table.heading(col, text=f"{t:g}")
+                self.table.column(col, width=52, anchor="center")
+            self.table.pack(fill="both", expand=True)
+
+        ttk.Label(frm, text="Each cell is the average needed on the remaining weight to reach a target final mark "
+                            "(blank or ✗ = out of reach).", wraplength=560).pack(fill="x", pady=(6, 0))
+        self.top.bind("<Escape>", lambda e: self.top.destroy())
+        self.render()
+
+    # Row labels and needed averages (one row per label) of the selected scenario
+    def scenario_rows(self):
+        index = self.choices.index(self.scenario_var.get())
+        if index == 0:
+            return ["now"], self.grid["needed"][None, :]
+        return [f"{m:g}" for m in self.grid["marks"]], self.grid["scenarios"][index - 1]
+
+    # Redraws the heatmap or table for the selected scenario
+    def render(self):
+        import numpy as np
+        labels, values = self.scenario_rows()
+        if HAVE_MPL:
+            targets = self.grid["targets"]
+            image = np.where(values > 100.0, np.nan, values)
+            self.ax.clear()
+            mesh = self.ax.imshow(image, aspect="auto", origin="lower", cmap="RdYlGn_r", vmin=0.0, vmax=100.0,
+                                  extent=(targets[0], targets[-1], -0.5, len(labels) - 0.5), interpolation="nearest")
+            step = max(1, len(labels) // 10)
+            self.ax.set_yticks(range(0, len(labels), step))
+            self.ax.set_yticklabels(labels[::step])
+            self.ax.set_xlabel("Target final mark (%)")
+            self.ax.set_ylabel("Hypothetical mark (%)" if len(labels) > 1 else "")
+            if self.colorbar is None:
+                self.colorbar = self.fig.colorbar(mesh, ax=self.ax, label="Needed average on remaining (%)")
+            else:
+                self.colorbar.update_normal(mesh)
+            self.canvas.draw_idle()
+            return
+        cells = values[:, ::self.table_stride]
+        text = np.where(cells > 100.0, "✗", np.char.mod("%.1f", np.minimum(cells, 100.0)))
+        self.table.delete(*self.table.get_children())
+        for label, row in zip(labels, text.tolist()):
+            self.table.insert("", "end", values=[label] + row)
+
 # Dialog for selecting a save file
 class FileSelectionDialog:
     # Initializes the file selection dialog